@@ -1,41 +1,200 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from src.repo_grader import RepoGrader
+from src.blob_cache import BlobCache
+from src.github_client import GitHubClient
+from src.result_cache import SQLiteResultCache
+from src.jobs import JobQueue, COMPLETED, FAILED
+from src.metrics import REGISTRY
+from src.config import (BLOB_CACHE_DIR, BLOB_CACHE_MAX_BYTES, RESULT_CACHE_PATH, JOB_WORKERS,
+                        GITHUB_API_URL, GITHUB_RAW_URL, FETCH_CONCURRENCY, CACHE_ADMIN_TOKEN,
+                        SSE_MAX_STREAMS, SSE_MAX_SECONDS)
+import hmac
+import json
 import os
+import threading
+import time
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Shared across requests so hit/miss counters cover the whole process
+blob_cache = BlobCache(BLOB_CACHE_DIR, BLOB_CACHE_MAX_BYTES)
+result_cache = SQLiteResultCache(RESULT_CACHE_PATH)
+# One client for all jobs so its ETag cache and rate-limit budget are shared
+github_client = GitHubClient(os.environ.get('GITHUB_TOKEN'), api_url=GITHUB_API_URL,
+                             raw_url=GITHUB_RAW_URL, pool_size=FETCH_CONCURRENCY * JOB_WORKERS)
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_HEARTBEAT_SECONDS = 15
+# Milliseconds a browser waits before reconnecting a closed event stream
+SSE_RETRY_MS = 1000
+
+# Open event streams, each of which holds a gunicorn thread
+stream_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+def make_grader(progress_callback=None) -> RepoGrader:
+    return RepoGrader(
+        github_token=os.environ.get('GITHUB_TOKEN'),
+        anthropic_api_key=os.environ.get('ANTHROPIC_API_KEY'),
+        rubric_path="src/data/rubric.json",
+        blob_cache=blob_cache,
+        result_cache=result_cache,
+        progress_callback=progress_callback,
+        github_client=github_client
+    )
+
+def run_grading_job(job):
+    payload = job.payload
+    grader = make_grader(progress_callback=job.add_event)
+    return grader.analyze_repo(payload['owner'], payload['repo'],
+                               force_regrade=payload['force_regrade'])
+
+job_queue = JobQueue(run_grading_job, workers=JOB_WORKERS)
+
 @app.route('/api/grade', methods=['POST'])
 def grade_repo():
     try:
         data = request.get_json()
         repo_url = data.get('repoUrl')
+        force_regrade = bool(data.get('forceRegrade', False))
         
         if not repo_url:
             return jsonify({'error': 'Repository URL is required'}), 400
 
-        github_token = os.environ.get('GITHUB_TOKEN')
-        anthropic_api_key = os.environ.get('ANTHROPIC_API_KEY')
-
         # Parse GitHub URL
         parts = repo_url.strip("/").split("/")
         owner = parts[-2]
         repo = parts[-1]
 
-        # Initialize grader
-        grader = RepoGrader(
-            github_token=github_token,
-            anthropic_api_key=anthropic_api_key,
-            rubric_path="src/data/rubric.json"
-        )
-
-        # Grade repository
-        results = grader.analyze_repo(owner, repo)
+        # Resolve the commit up front so resubmissions of a commit that is
+        # already being graded share one job. A forced regrade gets its own
+        # key: joining a normal job would hand back the cached result it
+        # was asked to replace
+        commit = github_client.get_head_sha(owner, repo)
+        key = f"{owner}/{repo}@{commit}" + (":force" if force_regrade else "")
+        job, created = job_queue.submit(key, {
+            'owner': owner,
+            'repo': repo,
+            'commit': commit,
+            'force_regrade': force_regrade
+        })
         
         return jsonify({
             'success': True,
-            'data': results
+            'jobId': job.id,
+            'status': job.status,
+            'deduplicated': not created
+        }), 202
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/grade/<job_id>', methods=['GET'])
+def grade_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown job ID'
+        }), 404
+
+    return jsonify({
+        'success': job.status != FAILED,
+        **job.to_dict()
+    })
+
+@app.route('/api/grade/<job_id>/events', methods=['GET'])
+def grade_events(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Unknown job ID'
+        }), 404
+
+    # Resume after the last event a reconnecting EventSource saw
+    try:
+        start = max(0, int(request.headers.get('Last-Event-ID', -1)) + 1)
+    except ValueError:
+        start = 0
+
+    if not stream_slots.acquire(blocking=False):
+        return jsonify({
+            'success': False,
+            'error': 'Too many open event streams; poll the job status instead'
+        }), 503, {'Retry-After': str(SSE_RETRY_MS // 1000 or 1)}
+    deadline = time.monotonic() + SSE_MAX_SECONDS
+
+    def stream():
+        # Close after SSE_MAX_SECONDS even if the job isn't done, so a
+        # long grade doesn't hold the thread; the browser reconnects with
+        # Last-Event-ID and picks up where this stream stopped
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            index = start
+            while time.monotonic() < deadline:
+                events = job.wait_for_events(
+                    index, timeout=min(SSE_HEARTBEAT_SECONDS, max(0, deadline - time.monotonic())))
+                if not events:
+                    yield ": keep-alive\n\n"
+                    continue
+                for event in events:
+                    yield (f"id: {index}\n"
+                           f"event: {event['event']}\n"
+                           f"data: {json.dumps(event['data'])}\n\n")
+                    index += 1
+                    if event['event'] in (COMPLETED, FAILED):
+                        return
+        finally:
+            stream_slots.release()
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Counters kept by the shared clients and caches themselves
+    github = github_client.stats()
+    REGISTRY.set('grader_github_requests_total', github['requests'])
+    REGISTRY.set('grader_github_retries_total', github['retries'])
+    REGISTRY.set('grader_github_not_modified_total', github['not_modified'])
+    if github['remaining'] is not None:
+        REGISTRY.set('grader_github_rate_limit_remaining', github['remaining'])
+    blobs = blob_cache.stats()
+    REGISTRY.set('grader_blob_cache_lookups_total', blobs['hits'], result='hit')
+    REGISTRY.set('grader_blob_cache_lookups_total', blobs['misses'], result='miss')
+    REGISTRY.set('grader_blob_cache_bytes', blobs['bytes'])
+
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    try:
+        data = request.get_json(silent=True) or {}
+        repo_url = data.get('repoUrl')
+
+        if repo_url:
+            parts = repo_url.strip("/").split("/")
+            removed = result_cache.invalidate(f"{parts[-2]}/{parts[-1]}")
+        else:
+            # Clearing every repository forces a regrade of all of them, so
+            # it takes the admin token
+            token = request.headers.get('Authorization', '')
+            if not CACHE_ADMIN_TOKEN or not hmac.compare_digest(
+                    token.encode(), f"Bearer {CACHE_ADMIN_TOKEN}".encode()):
+                return jsonify({
+                    'success': False,
+                    'error': 'repoUrl is required (clearing the whole cache needs the admin token)'
+                }), 403
+            removed = result_cache.invalidate()
+
+        return jsonify({
+            'success': True,
+            'removed': removed
         })
 
     except Exception as e:
@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import io
+import json
+import re
+import tarfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.parse import unquote, urlparse
+
+
+def blob_sha(content: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class FakeGitHub:
+    """Local stand-in for the parts of the GitHub API the grader uses.
+
+    Serves each repository in repos ({"owner/repo": {path: bytes}}) on the
+    main branch: commit SHA, recursive tree (with ETags), blobs, tarball,
+    and raw files with Range support at <url>/raw. Requests are counted
+    per endpoint and readable at <url>/_stats.
+    """
+
+    def __init__(self, repos: Dict[str, Dict[str, bytes]]):
+        self.repos = repos
+        self.requests = Counter()
+        self.bytes_sent = 0
+        self._blobs = {}     # sha -> content
+        self._trees = {}     # "owner/repo" -> (tree sha, [(path, sha, size)])
+        self._tarballs = {}  # "owner/repo" -> gzipped tarball
+        self._lock = threading.Lock()
+        for name in repos:
+            self._index(name)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _index(self, name: str) -> None:
+        entries = []
+        for path, content in sorted(self.repos[name].items()):
+            sha = blob_sha(content)
+            self._blobs[sha] = content
+            entries.append((path, sha, len(content)))
+        tree_sha = hashlib.sha1(repr(entries).encode()).hexdigest()
+        self._trees[name] = (tree_sha, entries)
+
+    def tree(self, name: str) -> Dict:
+        tree_sha, entries = self._trees[name]
+        return {'sha': tree_sha, 'truncated': False,
+                'tree': [{'path': path, 'mode': '100644', 'type': 'blob', 'sha': sha, 'size': size,
+                          'url': f"{self.url}/repos/{name}/git/blobs/{sha}"}
+                         for path, sha, size in entries]}
+
+    def tarball(self, name: str) -> bytes:
+        with self._lock:
+            if name not in self._tarballs:
+                buffer = io.BytesIO()
+                prefix = f"{name.replace('/', '-')}-{self._trees[name][0][:7]}"
+                with tarfile.open(fileobj=buffer, mode='w:gz', compresslevel=1) as archive:
+                    for path, content in sorted(self.repos[name].items()):
+                        info = tarfile.TarInfo(f"{prefix}/{path}")
+                        info.size = len(content)
+                        archive.addfile(info, io.BytesIO(content))
+                self._tarballs[name] = buffer.getvalue()
+            return self._tarballs[name]
+
+    def start(self) -> 'FakeGitHub':
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send(self, status: int, body: bytes = b'', headers: Dict[str, str] = None) -> None:
+                self.send_response(status)
+                for key, value in {'Content-Length': str(len(body)), 'X-RateLimit-Limit': '5000',
+                                   'X-RateLimit-Remaining': '5000', **(headers or {})}.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+                with fake._lock:
+                    fake.bytes_sent += len(body)
+
+            def count(self, endpoint: str) -> None:
+                with fake._lock:
+                    fake.requests[endpoint] += 1
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                path = url.path
+                if path == '/_stats':
+                    # Not part of the GitHub API: lets a benchmark in another
+                    # process read (and with ?reset=1, clear) the counters
+                    with fake._lock:
+                        stats = {'requests': dict(fake.requests), 'bytes_sent': fake.bytes_sent}
+                        if 'reset=1' in url.query:
+                            fake.requests.clear()
+                            fake.bytes_sent = 0
+                    body = json.dumps(stats).encode()
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                match = re.fullmatch(r'/repos/([^/]+/[^/]+)/(.+)', path)
+                name = match.group(1) if match else None
+                if match and name in fake.repos:
+                    rest = match.group(2)
+                    if rest == 'commits/main':
+                        self.count('commit')
+                        return self.send(200, fake._trees[name][0].encode())
+                    if rest == 'git/trees/main':
+                        self.count('tree')
+                        etag = f'"{fake._trees[name][0]}"'
+                        if self.headers.get('If-None-Match') == etag:
+                            return self.send(304)
+                        return self.send(200, json.dumps(fake.tree(name)).encode(),
+                                         {'ETag': etag, 'Content-Type': 'application/json'})
+                    if rest.startswith('git/blobs/') and rest[10:] in fake._blobs:
+                        self.count('blob')
+                        content = base64.b64encode(fake._blobs[rest[10:]]).decode()
+                        return self.send(200, json.dumps({'content': content,
+                                                          'encoding': 'base64'}).encode())
+                    if rest == 'tarball/main':
+                        self.count('tarball')
+                        return self.send(200, fake.tarball(name))
+
+                match = re.fullmatch(r'/raw/([^/]+/[^/]+)/main/(.+)', path)
+                if match and match.group(1) in fake.repos:
+                    content = fake.repos[match.group(1)].get(unquote(match.group(2)))
+                    if content is not None:
+                        self.count('raw')
+                        return self.send_range(content)
+
+                self.count('not_found')
+                self.send(404)
+
+            def send_range(self, content: bytes) -> None:
+                match = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', ''))
+                if not match:
+                    return self.send(200, content)
+                start, end = match.groups()
+                if start:
+                    first, last = int(start), min(len(content) - 1, int(end or len(content) - 1))
+                else:
+                    first, last = max(0, len(content) - int(end)), len(content) - 1
+                self.send(206, content[first:last + 1],
+                          {'Content-Range': f"bytes {first}-{last}/{len(content)}"})
+
+        return Handler
@@ -0,0 +1,95 @@
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.packing import estimate_tokens
+
+ITEM_PATTERN = re.compile(r"^Title: (.*)\n(?:.*\n)*?Maximum points: (\d+)\nIs critical: (\w+)", re.M)
+
+
+def message_text(messages: Any) -> str:
+    """Flatten a prompt (a string, or messages with string or block content) to text"""
+    if isinstance(messages, str):
+        return messages
+    parts = []
+    for message in messages:
+        content = getattr(message, 'content', message)
+        if isinstance(content, list):
+            parts.extend(block['text'] for block in content if block.get('type') == 'text')
+        else:
+            parts.append(content)
+    return "\n".join(parts)
+
+
+class FakeChatAnthropic:
+    """Deterministic stand-in for ChatAnthropic.
+
+    Answers every rubric item in a prompt in the format parse_batch_response
+    expects, after sleeping for latency seconds (streamed responses spread
+    it evenly over their chunks). Critical items pass unless listed in
+    failing, so every batch runs; other grades are derived from a hash of
+    the title. Usage metadata is estimated from the prompt, with the first
+    content block counted as a cache read after its first appearance.
+    """
+
+    def __init__(self, latency: float = 0.0, explanation_words: int = 40,
+                 failing: Optional[List[str]] = None):
+        self.latency = latency
+        self.explanation_words = explanation_words
+        self.failing = set(failing or [])
+        self.calls = 0
+        self._cached_prefixes = set()
+        self._lock = threading.Lock()
+
+    def respond(self, text: str) -> str:
+        blocks = []
+        for title, maximum, critical in ITEM_PATTERN.findall(text):
+            if title in self.failing:
+                grade = 0
+            elif critical == 'True':
+                grade = 1
+            else:
+                grade = int(hashlib.sha256(title.encode()).hexdigest(), 16) % (int(maximum) + 1)
+            explanation = ' '.join(["Evidence"] * self.explanation_words)
+            blocks.append(f"ITEM: {title}\nGRADE: {grade}\nEXPLANATION: {explanation}\nEND_ITEM\n")
+        return "\n".join(blocks)
+
+    def usage(self, messages: Any, text: str, output: str) -> Dict[str, Any]:
+        cache_read = 0
+        content = getattr(messages[0], 'content', None) if isinstance(messages, list) else None
+        if isinstance(content, list) and content and content[0].get('cache_control'):
+            prefix = content[0]['text']
+            with self._lock:
+                if prefix in self._cached_prefixes:
+                    cache_read = estimate_tokens(prefix)
+                self._cached_prefixes.add(prefix)
+        input_tokens = estimate_tokens(text)
+        output_tokens = estimate_tokens(output)
+        return {'input_tokens': input_tokens, 'output_tokens': output_tokens,
+                'total_tokens': input_tokens + output_tokens,
+                'input_token_details': {'cache_read': cache_read}}
+
+    def invoke(self, messages: Any, **kwargs: Any) -> AIMessage:
+        text = message_text(messages)
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        output = self.respond(text)
+        return AIMessage(content=output, usage_metadata=self.usage(messages, text, output))
+
+    def stream(self, messages: Any, **kwargs: Any) -> Iterator[AIMessageChunk]:
+        """The same response in word-sized chunks, with the usage on the last one"""
+        text = message_text(messages)
+        with self._lock:
+            self.calls += 1
+        output = self.respond(text)
+        words = re.findall(r'\S+\s*', output) or ['']
+        for i, word in enumerate(words):
+            time.sleep(self.latency / len(words))
+            last = i == len(words) - 1
+            yield AIMessageChunk(content=word,
+                                 usage_metadata=self.usage(messages, text, output) if last else None)
@@ -0,0 +1,130 @@
+import base64
+import json
+import random
+from typing import Dict
+
+# Share of a fixture's files in each kind; the rest are images and other
+# files that are only ever listed
+FILE_MIX = [('r', 0.30), ('py', 0.15), ('qmd', 0.08), ('md', 0.07),
+            ('ipynb', 0.05), ('csv', 0.10), ('parquet', 0.02), ('png', 0.23)]
+
+WORDS = ("the model estimates vote share by state using polling data from the "
+         "election cycle and we simulate outcomes under several scenarios with "
+         "regression results showing a clear effect of turnout on margin").split()
+
+
+def prose(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def r_script(rng: random.Random, lines: int) -> str:
+    body = [f"# {prose(rng, 8)}", "library(tidyverse)", "library(arrow)"]
+    for i in range(lines):
+        body.append(f"x_{i} <- mean(polls$pct[polls$state == 'S{rng.randint(1, 50)}'])")
+    body.append("model <- lm(pct ~ pollster + sample_size, data = polls)")
+    return '\n'.join(body) + '\n'
+
+
+def py_script(rng: random.Random, lines: int) -> str:
+    body = [f'"""{prose(rng, 12)}"""', "import pandas as pd", ""]
+    for i in range(lines // 3):
+        body += [f"def step_{i}(df):", f"    return df[df['state'] == 'S{rng.randint(1, 50)}']", ""]
+    return '\n'.join(body) + '\n'
+
+
+def notebook(rng: random.Random, cells: int, output_bytes: int) -> str:
+    """A notebook whose plot outputs dwarf its source, like most student notebooks"""
+    image = base64.b64encode(rng.randbytes(output_bytes * 3 // 4)).decode()
+    nb_cells = []
+    for i in range(cells):
+        nb_cells.append({'cell_type': 'markdown', 'metadata': {}, 'source': [f"## {prose(rng, 6)}"]})
+        nb_cells.append({'cell_type': 'code', 'metadata': {}, 'execution_count': i,
+                         'source': [f"df.plot(y='pct_{i}')"],
+                         'outputs': [{'output_type': 'display_data', 'metadata': {},
+                                      'data': {'image/png': image, 'text/plain': ['<Figure>']}}]})
+    return json.dumps({'cells': nb_cells, 'metadata': {}, 'nbformat': 4, 'nbformat_minor': 5})
+
+
+def csv_file(rng: random.Random, rows: int) -> str:
+    lines = ["pollster,state,pct,sample_size,end_date"]
+    lines += [f"P{rng.randint(1, 40)},S{rng.randint(1, 50)},{rng.uniform(30, 60):.1f},"
+              f"{rng.randint(300, 3000)},2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+              for _ in range(rows)]
+    return '\n'.join(lines) + '\n'
+
+
+def parquet_stub(rng: random.Random, data_bytes: int) -> bytes:
+    """Random column data followed by a real parquet footer (schema and row count)"""
+    def varint(n: int) -> bytes:
+        out = bytearray()
+        while True:
+            if n < 0x80:
+                return bytes(out + bytes([n]))
+            out.append((n & 0x7f) | 0x80)
+            n >>= 7
+
+    def zigzag(n: int) -> bytes:
+        return varint((n << 1) ^ (n >> 63))
+
+    def element(name: str, type_id: int = None, children: int = None) -> bytes:
+        # SchemaElement: 1 type (i32), 4 name (binary), 5 num_children (i32)
+        out = b''
+        last = 0
+        if type_id is not None:
+            out += bytes([0x15]) + zigzag(type_id)
+            last = 1
+        encoded = name.encode()
+        out += bytes([((4 - last) << 4) | 0x08]) + varint(len(encoded)) + encoded
+        if children is not None:
+            out += bytes([0x15]) + zigzag(children)
+        return out + b'\x00'
+
+    columns = [('state', 6), ('pct', 5), ('sample_size', 1)]
+    schema = [element('schema', children=len(columns))] + [element(n, t) for n, t in columns]
+    # FileMetaData: 1 version (i32), 2 schema (list<struct>), 3 num_rows (i64)
+    footer = (bytes([0x15]) + zigzag(1)
+              + bytes([0x19, (len(schema) << 4) | 0x0c]) + b''.join(schema)
+              + bytes([0x16]) + zigzag(data_bytes // 16) + b'\x00')
+    return b'PAR1' + rng.randbytes(data_bytes) + footer + len(footer).to_bytes(4, 'little') + b'PAR1'
+
+
+def make_repo(files: int, seed: int = 0, large_csv_bytes: int = 20_000_000,
+              notebook_output_bytes: int = 200_000) -> Dict[str, bytes]:
+    """A deterministic student repository with the given number of files.
+
+    Always has a README and a paper; the rest follow FILE_MIX. One CSV is
+    large_csv_bytes long, as if raw data had been committed.
+    """
+    rng = random.Random(seed)
+    repo = {
+        'README.md': (f"# US election forecast\n\n{prose(rng, 150)}\n\n"
+                      "## LLM usage\n\nNo LLMs were used.\n").encode(),
+        'paper/paper.qmd': (f"---\ntitle: Forecast\nauthor: A. Student\n---\n\n# Introduction\n\n"
+                            f"{prose(rng, 2000)}\n\n# References\n\nR Core Team (2023).\n").encode(),
+        'paper/references.bib': b"@Manual{citeR, title = {R}, author = {{R Core Team}}, year = {2023}}\n",
+        'data/raw_data/raw_polls.csv': csv_file(rng, large_csv_bytes // 45).encode(),
+    }
+
+    remaining = max(0, files - len(repo))
+    counts = [(kind, int(remaining * share)) for kind, share in FILE_MIX]
+    counts[0] = (counts[0][0], counts[0][1] + remaining - sum(n for _, n in counts))
+    for kind, count in counts:
+        for i in range(count):
+            if kind == 'r':
+                repo[f"scripts/{i:04d}-analysis.R"] = r_script(rng, rng.randint(20, 120)).encode()
+            elif kind == 'py':
+                repo[f"scripts/python/step_{i:04d}.py"] = py_script(rng, rng.randint(20, 120)).encode()
+            elif kind == 'qmd':
+                repo[f"other/sketches/notes_{i:04d}.qmd"] = f"# Notes\n\n{prose(rng, 300)}\n".encode()
+            elif kind == 'md':
+                repo[f"other/llm/usage_{i:04d}.md"] = f"Prompt: {prose(rng, 200)}\n".encode()
+            elif kind == 'ipynb':
+                repo[f"notebooks/explore_{i:04d}.ipynb"] = notebook(
+                    rng, rng.randint(3, 8), notebook_output_bytes // 4).encode()
+            elif kind == 'csv':
+                repo[f"data/analysis_data/part_{i:04d}.csv"] = csv_file(rng, rng.randint(50, 2000)).encode()
+            elif kind == 'parquet':
+                repo[f"data/analysis_data/part_{i:04d}.parquet"] = parquet_stub(rng, rng.randint(10_000, 200_000))
+            else:
+                repo[f"other/figures/fig_{i:04d}.png"] = rng.randbytes(rng.randint(5_000, 50_000))
+    return repo
@@ -0,0 +1,179 @@
+"""Offline end-to-end benchmark of RepoGrader.analyze_repo.
+
+Grades synthetic repositories served by a local fake GitHub API (in its
+own process, so it doesn't share the GIL or the memory trace) with a
+deterministic fake LLM, and prints the measurements as JSON:
+
+    python -m benchmarks.run --sizes 10 200 2000 --iterations 5 --latency 0.5 --output bench.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import requests
+
+from benchmarks.fake_github import FakeGitHub
+from benchmarks.fake_llm import FakeChatAnthropic
+from benchmarks.fixtures import make_repo
+from src.github_client import GitHubClient
+from src.metrics import Metrics
+from src.repo_grader import PROMPT_VERSION, RepoGrader
+
+OWNER = "bench"
+RUBRIC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "src", "data", "rubric.json")
+
+
+def serve_fixture(files: int, options: Dict[str, Any], ready: multiprocessing.Queue) -> None:
+    fake = FakeGitHub({f"{OWNER}/repo-{files}": make_repo(files, **options)})
+    ready.put(fake.url)
+    fake.server.serve_forever()
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(RUBRIC_PATH)).stdout.strip()
+    except OSError:
+        return ''
+
+
+def bench_size(files: int, args: argparse.Namespace) -> Dict[str, Any]:
+    options = {'seed': args.seed, 'large_csv_bytes': args.large_csv_bytes,
+               'notebook_output_bytes': args.notebook_output_bytes}
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve_fixture, args=(files, options, ready), daemon=True)
+    server.start()
+    try:
+        url = ready.get(timeout=600)
+        client = GitHubClient(None, api_url=url, raw_url=f"{url}/raw",
+                              pool_size=args.fetch_concurrency)
+        llm = FakeChatAnthropic(latency=args.latency)
+        runs = []
+        for iteration in range(args.warmup + args.iterations):
+            requests.get(f"{url}/_stats?reset=1")
+            grader = RepoGrader(None, None, RUBRIC_PATH, source=args.source,
+                                fetch_concurrency=args.fetch_concurrency,
+                                llm_concurrency=args.llm_concurrency,
+                                github_client=client, llm=llm, metrics=Metrics())
+            if args.memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            results = grader.analyze_repo(OWNER, f"repo-{files}")
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if args.memory else None
+            if args.memory:
+                tracemalloc.stop()
+            if iteration < args.warmup:
+                continue
+
+            calls = results.get('llm_calls', [])
+            runs.append({
+                'seconds': elapsed,
+                'peak_memory_bytes': peak,
+                'github': requests.get(f"{url}/_stats").json(),
+                'llm_calls': len(calls),
+                'estimated_prompt_tokens': sum(c['estimated_input_tokens'] for c in calls),
+                'input_tokens': sum(c['input_tokens'] or 0 for c in calls),
+                'cache_read_tokens': sum(c['cache_read_input_tokens'] or 0 for c in calls),
+                'output_tokens': sum(c['output_tokens'] or 0 for c in calls),
+                'timings': results.get('timings', {}),
+                'counters': results.get('counters', {}),
+                'total_score': results.get('total_score')
+            })
+    finally:
+        server.terminate()
+        server.join()
+
+    seconds = [run['seconds'] for run in runs]
+    peaks = [run['peak_memory_bytes'] for run in runs if run['peak_memory_bytes'] is not None]
+    last = runs[-1]
+    return {
+        'files': files,
+        'iterations': len(runs),
+        'latency_seconds': {'p50': percentile(seconds, 50), 'p95': percentile(seconds, 95),
+                            'mean': statistics.mean(seconds), 'min': min(seconds),
+                            'max': max(seconds)},
+        'throughput': {'repos_per_second': len(runs) / sum(seconds),
+                       'files_per_second': files * len(runs) / sum(seconds)},
+        'peak_memory_bytes': max(peaks) if peaks else None,
+        # Every measured iteration does the same work, so the last one
+        # stands for all of them (the first may differ by ETag revalidation)
+        'github_requests': last['github']['requests'],
+        'github_bytes': last['github']['bytes_sent'],
+        'llm_calls': last['llm_calls'],
+        'estimated_prompt_tokens': last['estimated_prompt_tokens'],
+        'input_tokens': last['input_tokens'],
+        'cache_read_tokens': last['cache_read_tokens'],
+        'output_tokens': last['output_tokens'],
+        'stage_seconds': {stage: statistics.mean(run['timings'].get(stage, 0) for run in runs)
+                          for stage in last['timings']},
+        'counters': last['counters'],
+        'total_score': last['total_score']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RepoGrader.analyze_repo offline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 200, 2000],
+                        help="Number of files in each fixture repository")
+    parser.add_argument("--iterations", type=int, default=5, help="Measured runs per size")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs per size")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds the fake LLM takes per call")
+    parser.add_argument("--source", choices=["api", "archive"], default="api")
+    parser.add_argument("--fetch-concurrency", type=int, default=8)
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--large-csv-bytes", type=int, default=20_000_000,
+                        help="Size of the one large CSV committed to each fixture")
+    parser.add_argument("--notebook-output-bytes", type=int, default=200_000,
+                        help="Rough size of the outputs embedded in each notebook")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="Skip tracemalloc, which slows Python-heavy stages down")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    parser.add_argument("--quiet", action="store_true", help="Hide the grader's progress output")
+    args = parser.parse_args()
+
+    results = []
+    # Keep stdout for the JSON
+    with contextlib.redirect_stdout(open(os.devnull, 'w') if args.quiet else sys.stderr):
+        for files in args.sizes:
+            print(f"Benchmarking {files} files...")
+            results.append(bench_size(files, args))
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'prompt_version': PROMPT_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {key: value for key, value in vars(args).items()
+                       if key not in ('output', 'quiet')},
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,50 +4,27 @@ console.log('grader.js loaded');
 // API endpoint
 const API_URL = 'https://grader-a04u.onrender.com/api/grade';
 
-// Progress bar functionality
-let progressInterval;
-
-function startProgress() {
-    let progress = 0;
+// Progress bar, driven by the job's event stream
+function setProgress(percent) {
     const progressBar = document.getElementById('progressBar');
     const progressText = document.getElementById('progressText');
-    const stages = [
-        'Fetching repository contents...',
-        'Processing files...',
-        'Analyzing critical requirements...',
-        'Evaluating documentation...',
-        'Checking technical implementation...',
-        'Finalizing grades...'
-    ];
-    let currentStage = 0;
-
-    progressInterval = setInterval(() => {
-        if (progress < 90) {  // Only auto-increment to 90%
-            // Increment more slowly as we progress
-            const increment = Math.max(0.5, (90 - progress) / 20);
-            progress = Math.min(90, progress + increment);
-            
-            // Update progress bar and text
-            progressBar.style.width = `${progress}%`;
-            progressText.textContent = `${Math.round(progress)}%`;
+    progressBar.style.width = `${percent}%`;
+    progressText.textContent = `${Math.round(percent)}%`;
+}
 
-            // Update stages
-            if (progress > (currentStage + 1) * (90 / stages.length) && currentStage < stages.length) {
-                updateProgress(stages[currentStage]);
-                currentStage++;
-            }
-        }
-    }, 200);
+function startProgress() {
+    const progressBar = document.getElementById('progressBar');
+    progressBar.classList.remove('bg-green-600', 'bg-red-600');
+    progressBar.classList.add('bg-blue-600');
+    setProgress(0);
+    updateProgress('Submitting repository...');
 }
 
 function stopProgress(success = true) {
-    clearInterval(progressInterval);
     const progressBar = document.getElementById('progressBar');
-    const progressText = document.getElementById('progressText');
     
     // Instantly complete the progress bar
-    progressBar.style.width = '100%';
-    progressText.textContent = '100%';
+    setProgress(100);
     progressBar.classList.remove('bg-blue-600');
     progressBar.classList.add(success ? 'bg-green-600' : 'bg-red-600');
 }
@@ -167,7 +144,6 @@ document.getElementById('gradeForm').addEventListener('submit', async (e) => {
     results.classList.add('hidden');
     progress.innerHTML = '';
     
-    // Start progress animation
     startProgress();
     
     try {
@@ -179,7 +155,14 @@ document.getElementById('gradeForm').addEventListener('submit', async (e) => {
             body: JSON.stringify({ repoUrl }),
         });
 
-        const data = await response.json();
+        const submitted = await response.json();
+
+        if (!submitted.success) {
+            stopProgress(false);
+            throw new Error(submitted.error || 'An error occurred during grading');
+        }
+
+        const data = await streamJob(submitted.jobId);
 
         if (!data.success) {
             stopProgress(false);
@@ -199,15 +182,110 @@ document.getElementById('gradeForm').addEventListener('submit', async (e) => {
     }
 });
 
-function displayResults(data) {
+// Grading runs as a background job. Follow its event stream, rendering
+// each batch's grades as they arrive, and fall back to polling if the
+// stream can't be opened.
+const POLL_INTERVAL_MS = 2000;
+
+function streamJob(jobId) {
+    if (!window.EventSource) {
+        return pollJob(jobId);
+    }
+
+    return new Promise((resolve) => {
+        const source = new EventSource(`${API_URL}/${jobId}/events`);
+        const results = document.getElementById('results');
+        const partial = { grades: {}, explanations: {} };
+        let plannedCalls = 0;
+        let finishedCalls = 0;
+        let finished = false;
+
+        const on = (event, handler) => source.addEventListener(event, (e) => handler(JSON.parse(e.data)));
+        const finish = (job) => {
+            finished = true;
+            source.close();
+            resolve(job);
+        };
+        const showPartial = () => {
+            displayResults(partial, true);
+            results.classList.remove('hidden');
+        };
+
+        on('running', () => updateProgress('Fetching repository contents...'));
+        on('tree_fetched', (data) => {
+            updateProgress(`Found ${data.files} files in the repository`);
+            setProgress(10);
+        });
+        on('files_fetched', (data) => {
+            updateProgress(`Downloaded ${data.downloaded} files: ${data.documentation} documentation, ` +
+                           `${data.code} code, ${data.data_metadata} data, ${data.other} other`);
+            setProgress(20);
+        });
+        on('grading_planned', (data) => {
+            plannedCalls += Object.values(data).reduce((acc, calls) => acc + calls, 0);
+            updateProgress(`Grading ${Object.keys(data).join(', ')} items...`);
+        });
+        const mergeGrades = (data) => {
+            // Batches split over several calls keep each item's highest grade
+            Object.entries(data.grades).forEach(([title, grade]) => {
+                if (!(title in partial.grades) || grade > partial.grades[title]) {
+                    partial.grades[title] = grade;
+                    partial.explanations[title] = data.explanations[title];
+                }
+            });
+            showPartial();
+        };
+        // Items arrive one by one while a call is still generating...
+        on('item_graded', mergeGrades);
+        // ...and once more, all together, when it finishes
+        on('batch_result', (data) => {
+            mergeGrades(data);
+            if (!data.reused) {
+                finishedCalls++;
+                setProgress(20 + 75 * finishedCalls / Math.max(plannedCalls, finishedCalls));
+            }
+            updateProgress(`Graded ${Object.keys(data.grades).length} ${data.batch} items`);
+        });
+        on('critical_failed', () => {
+            updateProgress('Critical requirement failed - grading stopped');
+            showPartial();
+        });
+        on('completed', (data) => finish({ success: true, data }));
+        on('failed', (data) => finish({ success: false, error: data.error }));
+
+        source.onerror = () => {
+            if (!finished && source.readyState === EventSource.CLOSED) {
+                finished = true;
+                pollJob(jobId).then(resolve);
+            }
+        };
+    });
+}
+
+async function pollJob(jobId) {
+    while (true) {
+        const response = await fetch(`${API_URL}/${jobId}`);
+        const job = await response.json();
+
+        if (job.status === 'completed' || job.status === 'failed' || !response.ok) {
+            return job;
+        }
+        await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+    }
+}
+
+function displayResults(data, partial = false) {
     console.log('Displaying results:', data);
     const results = document.getElementById('results');
     results.innerHTML = ''; // Clear previous results
 
     // Create score summary card
+    const scoreText = partial || data.total_score === undefined
+        ? (partial ? 'Grading in progress...' : 'Overall Score: 0.00%')
+        : `Overall Score: ${data.total_score.toFixed(2)}%`;
     results.innerHTML = `
         <div class="bg-white p-6 rounded-lg shadow-lg mb-8">
-            <h2 class="text-3xl font-bold text-gray-900">Overall Score: ${data.total_score.toFixed(2)}%</h2>
+            <h2 class="text-3xl font-bold text-gray-900">${scoreText}</h2>
         </div>
     `;
 
@@ -1,7 +1,11 @@
 # gunicorn.conf.py
-timeout = 300  # 5 minutes instead of default 30 seconds
-workers = 1    # Reduce memory usage
-threads = 2
+# Grading runs on the in-process job queue (see src/jobs.py), so request
+# handlers return quickly. Keep a single worker: job state lives in that
+# process, and a second worker would not see its jobs.
+workers = 1
+# Cheap status polls and submissions while jobs run, plus the progress
+# streams, each of which holds a thread; keep this above SSE_MAX_STREAMS
+threads = 16
 worker_class = 'gthread'
 bind = "0.0.0.0:10000"
-timeout = 120  # Increased timeout for longer grading operations
\ No newline at end of file
+timeout = 120
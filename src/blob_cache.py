@@ -0,0 +1,129 @@
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, Optional
+
+# Git object ids are 40 (SHA-1) or 64 (SHA-256) hex characters; anything
+# else is not cached so it can never escape the cache directory
+SHA_PATTERN = re.compile(r'[0-9a-f]{40}([0-9a-f]{24})?')
+
+# Eviction frees the cache down to this fraction of max_bytes, so the full
+# scan it takes runs once per many puts rather than on every put once full
+LOW_WATER_FRACTION = 0.8
+
+
+class BlobCache:
+    """Content-addressed on-disk cache of decoded blob contents, keyed by git SHA.
+
+    Blobs are immutable, so an entry never goes stale. Writes go to a temp
+    file and are renamed into place, which keeps the cache safe to share
+    between gunicorn workers. When the cache grows past max_bytes the least
+    recently used entries (by mtime, refreshed on every hit) are evicted
+    until it is back under LOW_WATER_FRACTION of max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._evicting = False
+        os.makedirs(directory, exist_ok=True)
+        self._size = self._scan_size()
+
+    def _path(self, sha: str) -> str:
+        return os.path.join(self.directory, sha[:2], sha)
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if SHA_PATTERN.fullmatch(name):
+                    yield os.path.join(root, name)
+
+    def _scan_size(self) -> int:
+        total = 0
+        for path in self._entries():
+            try:
+                total += os.path.getsize(path)
+            except FileNotFoundError:
+                pass  # Evicted by another worker mid-scan
+        return total
+
+    def get(self, sha: str) -> Optional[str]:
+        """Return the cached content for a blob SHA, or None on a miss"""
+        if not SHA_PATTERN.fullmatch(sha or ''):
+            return None
+        path = self._path(sha)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def put(self, sha: str, content: str) -> None:
+        """Store a blob's content atomically, evicting old entries if over budget"""
+        if not SHA_PATTERN.fullmatch(sha or ''):
+            return
+        path = self._path(sha)
+        data = content.encode('utf-8')
+        if len(data) > self.max_bytes:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            self._size += len(data)
+            # One eviction at a time; puts meanwhile don't start another scan
+            evict = self._size > self.max_bytes and not self._evicting
+            if evict:
+                self._evicting = True
+        if evict:
+            try:
+                self.evict()
+            finally:
+                with self._lock:
+                    self._evicting = False
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache is under its low-water mark"""
+        target = int(self.max_bytes * LOW_WATER_FRACTION)
+        entries = []
+        for path in self._entries():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # Another worker got there first
+            total -= size
+        with self._lock:
+            self._size = total
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'bytes': self._size}
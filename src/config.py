@@ -2,4 +2,76 @@ import os
 GITHUB_API_TOKEN = os.environ.get('GITHUB_API_TOKEN')
 
 
-ANTHROPIC_API_TOKEN = os.environ.get('ANTHROPIC_API_TOKEN')
\ No newline at end of file
+ANTHROPIC_API_TOKEN = os.environ.get('ANTHROPIC_API_TOKEN')
+
+# Number of GitHub blob requests kept in flight at once
+FETCH_CONCURRENCY = int(os.environ.get('FETCH_CONCURRENCY', 8))
+
+# Where repository files come from: "api" fetches each blob through the
+# Contents API, "archive" downloads a single tarball
+REPO_SOURCE = os.environ.get('REPO_SOURCE', 'api')
+
+# Documentation and code files larger than this are listed but not downloaded
+MAX_BLOB_BYTES = int(os.environ.get('MAX_BLOB_BYTES', 1_000_000))
+
+# On-disk cache of downloaded blobs, keyed by git SHA
+BLOB_CACHE_DIR = os.environ.get('BLOB_CACHE_DIR', '.grader_cache/blobs')
+BLOB_CACHE_MAX_BYTES = int(os.environ.get('BLOB_CACHE_MAX_BYTES', 500_000_000))
+
+# SQLite database of finished grading results
+RESULT_CACHE_PATH = os.environ.get('RESULT_CACHE_PATH', '.grader_cache/results.sqlite3')
+
+# Bearer token required to clear the whole result cache through the web
+# API; without one set, the API only clears a single repository's results
+CACHE_ADMIN_TOKEN = os.environ.get('CACHE_ADMIN_TOKEN', '')
+
+# Maximum number of LLM grading calls in flight at once
+LLM_CONCURRENCY = int(os.environ.get('LLM_CONCURRENCY', 4))
+
+# Cap on estimated input tokens per LLM call; 0 uses 80% of the model's
+# context window, leaving room for estimates that run low
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', 0))
+
+# Number of grading jobs the web app runs at once
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+
+# Each open progress stream holds a server thread, so at most this many are
+# open at once (others get a 503 and the frontend polls instead), and each
+# closes after SSE_MAX_SECONDS for the browser to reconnect where it left off
+SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', 6))
+SSE_MAX_SECONDS = float(os.environ.get('SSE_MAX_SECONDS', 60))
+
+# Batch grading: repositories graded at once, and the request rates shared
+# across all of them
+ROSTER_WORKERS = int(os.environ.get('ROSTER_WORKERS', 4))
+GITHUB_REQUESTS_PER_SECOND = float(os.environ.get('GITHUB_REQUESTS_PER_SECOND', 10))
+LLM_REQUESTS_PER_MINUTE = float(os.environ.get('LLM_REQUESTS_PER_MINUTE', 50))
+
+# Base URL of the GitHub REST API (override for GitHub Enterprise or a local stub)
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+
+# Raw file host, used for ranged reads of data files
+GITHUB_RAW_URL = os.environ.get('GITHUB_RAW_URL', 'https://raw.githubusercontent.com')
+
+# Data files are described from a bounded read of their start (or, for
+# parquet, their footer) rather than downloaded: bytes and seconds per file
+DATA_SNIFF_MAX_BYTES = int(os.environ.get('DATA_SNIFF_MAX_BYTES', 64 * 1024))
+DATA_SNIFF_TIMEOUT = float(os.environ.get('DATA_SNIFF_TIMEOUT', 5))
+
+# Regrade a new commit by rerunning only the batches whose inputs changed
+# since the repository's last grade (set to 0 to always regrade in full)
+INCREMENTAL_REGRADING = os.environ.get('INCREMENTAL_REGRADING', '1') != '0'
+
+# Course codes (e.g. STA304, INF312H1). A folder or .Rproj named with
+# nothing but a course code marks a repository as a class project; a code
+# inside a longer name is only passed to the LLM as a hint
+COURSE_CODE_PATTERN = os.environ.get(
+    'COURSE_CODE_PATTERN',
+    r'(?<![a-z0-9])(STA|INF|ECO|POL|SOC|CSC|MAT|GGR|JSC|PSY)[ _-]?\d{3}([HY]\d)?(?![a-z0-9])')
+
+# Repositories whose documentation and code come to more than this many
+# tokens send the critical and document batches only the chunks most
+# relevant to each rubric item, up to RETRIEVAL_ITEM_TOKENS per item
+# (set RETRIEVAL_MIN_TOKENS to 0 to always send everything)
+RETRIEVAL_MIN_TOKENS = int(os.environ.get('RETRIEVAL_MIN_TOKENS', 50_000))
+RETRIEVAL_ITEM_TOKENS = int(os.environ.get('RETRIEVAL_ITEM_TOKENS', 4_000))
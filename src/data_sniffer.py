@@ -0,0 +1,225 @@
+import csv
+import io
+import json
+import struct
+from typing import Any, BinaryIO, Callable, Dict, List
+
+# Default bytes read per data file, from the start (delimited text) or the end (parquet)
+SNIFF_MAX_BYTES = 64 * 1024
+
+# Columns listed per file; wide tables are cut off here
+MAX_COLUMNS = 100
+
+DELIMITED_EXTENSIONS = ['csv', 'tsv', 'dat', 'txt']
+PARQUET_MAGIC = b'PAR1'
+
+# parquet.thrift Type and ConvertedType enums, for readable column types
+PARQUET_TYPES = ['boolean', 'int32', 'int64', 'int96', 'float', 'double',
+                 'byte_array', 'fixed_len_byte_array']
+PARQUET_CONVERTED_TYPES = {0: 'string', 5: 'decimal', 6: 'date', 9: 'timestamp_millis',
+                           10: 'timestamp_micros', 1: 'map', 3: 'list', 4: 'enum', 19: 'json'}
+
+
+def inspect_data_file(path: str, size: int, read_prefix: Callable[[int], bytes],
+                      read_tail: Callable[[int], bytes],
+                      max_bytes: int = SNIFF_MAX_BYTES) -> Dict[str, Any]:
+    """Describe a data file from a bounded read of its start or end.
+
+    read_prefix(n) and read_tail(n) return at most n bytes from the start
+    or end of the file. Only the one the format needs is called. Returns
+    whatever could be worked out (columns, delimiter, row count, schema);
+    an unreadable file gives {'sniff_error': ...} rather than raising.
+    """
+    ext = path.lower().split('.')[-1]
+    try:
+        if ext == 'parquet':
+            return parse_parquet_footer(read_tail(min(size, max_bytes)), size)
+        if ext in DELIMITED_EXTENSIONS:
+            return sniff_delimited(read_prefix(max_bytes), size)
+        if ext == 'json':
+            return sniff_json(read_prefix(max_bytes), size)
+    except Exception as e:
+        return {'sniff_error': str(e) or type(e).__name__}
+    return {}
+
+
+def read_tail(fileobj: BinaryIO, max_bytes: int) -> bytes:
+    """Last max_bytes of a stream that can only be read front to back"""
+    tail = b''
+    while True:
+        chunk = fileobj.read(max_bytes)
+        if not chunk:
+            return tail
+        tail = (tail + chunk)[-max_bytes:]
+
+
+def sniff_delimited(prefix: bytes, size: int) -> Dict[str, Any]:
+    """Delimiter, header and estimated row count of a delimited text file"""
+    complete = len(prefix) >= size
+    text = prefix.decode('utf-8', errors='replace')
+    lines = text.splitlines(keepends=True)
+    if not complete and len(lines) > 1:
+        lines = lines[:-1]  # The last line was probably cut off
+    sample = ''.join(lines)
+    if not sample.strip():
+        return {}
+
+    try:
+        dialect = csv.Sniffer().sniff(sample[:8192], delimiters=',\t;|')
+        delimiter = dialect.delimiter
+    except csv.Error:
+        delimiter = ','
+    rows = list(csv.reader(io.StringIO(sample), delimiter=delimiter))
+    header = rows[0] if rows else []
+
+    if complete:
+        estimated_rows = max(0, len(rows) - 1)
+    else:
+        # Scale the rows seen by how much of the file they covered
+        sample_bytes = len(sample.encode('utf-8'))
+        estimated_rows = int(max(0, len(lines) - 1) * size / max(1, sample_bytes))
+
+    return {
+        'delimiter': {'\t': 'tab'}.get(delimiter, delimiter),
+        'columns': header[:MAX_COLUMNS],
+        'column_count': len(header),
+        'estimated_rows': estimated_rows,
+        'rows_exact': complete
+    }
+
+
+def sniff_json(prefix: bytes, size: int) -> Dict[str, Any]:
+    """Top-level shape of a JSON file, when the whole file fits in the prefix"""
+    if len(prefix) < size:
+        return {}
+    data = json.loads(prefix.decode('utf-8'))
+    if isinstance(data, list):
+        fields = list(data[0].keys()) if data and isinstance(data[0], dict) else []
+        return {'estimated_rows': len(data), 'columns': fields[:MAX_COLUMNS], 'rows_exact': True}
+    if isinstance(data, dict):
+        return {'keys': list(data.keys())[:MAX_COLUMNS]}
+    return {}
+
+
+def parse_parquet_footer(tail: bytes, size: int) -> Dict[str, Any]:
+    """Schema and row count from the end of a parquet file"""
+    if len(tail) < 12 or tail[-4:] != PARQUET_MAGIC:
+        return {'sniff_error': 'not a parquet file'}
+    footer_length = struct.unpack('<I', tail[-8:-4])[0]
+    if footer_length + 8 > len(tail):
+        return {'sniff_error': f'parquet footer is {footer_length} bytes, over the read limit'}
+
+    metadata = CompactReader(tail[-8 - footer_length:-8]).read_struct()
+    schema = metadata.get(2, [])
+    columns = []
+    # The schema is the tree flattened depth-first, starting at the root:
+    # groups have num_children, leaves don't. Leaves are named by their
+    # path, e.g. "respondent.age"
+    groups = []  # [name, children not yet seen] for each group above
+    for element in schema[1:]:
+        name = element.get(4, b'').decode('utf-8', errors='replace')
+        if groups:
+            groups[-1][1] -= 1
+        if element.get(5):
+            groups.append([name, element[5]])
+            continue
+        column_type = (PARQUET_CONVERTED_TYPES.get(element.get(6))
+                       or (PARQUET_TYPES[element[1]] if element.get(1) in range(len(PARQUET_TYPES))
+                           else 'unknown'))
+        columns.append(f"{'.'.join([group[0] for group in groups] + [name])} ({column_type})")
+        while groups and groups[-1][1] <= 0:
+            groups.pop()
+
+    return {
+        'columns': columns[:MAX_COLUMNS],
+        'column_count': len(columns),
+        'estimated_rows': metadata.get(3, 0),
+        'rows_exact': True
+    }
+
+
+class CompactReader:
+    """Just enough of the Thrift compact protocol to read a parquet footer.
+
+    Structs come back as {field id: value}; binary fields stay bytes.
+    """
+
+    STOP, TRUE, FALSE, BYTE, I16, I32, I64, DOUBLE, BINARY, LIST, SET, MAP, STRUCT = range(13)
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def byte(self) -> int:
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def varint(self) -> int:
+        result = shift = 0
+        while True:
+            b = self.byte()
+            result |= (b & 0x7f) << shift
+            if not b & 0x80:
+                return result
+            shift += 7
+
+    def zigzag(self) -> int:
+        n = self.varint()
+        return (n >> 1) ^ -(n & 1)
+
+    def read_value(self, value_type: int) -> Any:
+        if value_type in (self.TRUE, self.FALSE):
+            return value_type == self.TRUE
+        if value_type == self.BYTE:
+            return struct.unpack('<b', bytes([self.byte()]))[0]
+        if value_type in (self.I16, self.I32, self.I64):
+            return self.zigzag()
+        if value_type == self.DOUBLE:
+            value = struct.unpack('<d', self.data[self.pos:self.pos + 8])[0]
+            self.pos += 8
+            return value
+        if value_type == self.BINARY:
+            length = self.varint()
+            value = self.data[self.pos:self.pos + length]
+            self.pos += length
+            return value
+        if value_type in (self.LIST, self.SET):
+            return self.read_list()
+        if value_type == self.MAP:
+            return self.read_map()
+        if value_type == self.STRUCT:
+            return self.read_struct()
+        raise ValueError(f"unknown thrift compact type {value_type}")
+
+    def read_list(self) -> List[Any]:
+        header = self.byte()
+        length = header >> 4
+        if length == 15:
+            length = self.varint()
+        element_type = header & 0x0f
+        if element_type in (self.TRUE, self.FALSE):
+            # Booleans inside collections take a byte each
+            return [self.byte() == self.TRUE for _ in range(length)]
+        return [self.read_value(element_type) for _ in range(length)]
+
+    def read_map(self) -> Dict[Any, Any]:
+        length = self.varint()
+        if not length:
+            return {}
+        types = self.byte()
+        return {self.read_value(types >> 4): self.read_value(types & 0x0f)
+                for _ in range(length)}
+
+    def read_struct(self) -> Dict[int, Any]:
+        fields = {}
+        field_id = 0
+        while True:
+            header = self.byte()
+            field_type = header & 0x0f
+            if field_type == self.STOP:
+                return fields
+            delta = header >> 4
+            field_id = field_id + delta if delta else self.zigzag()
+            fields[field_id] = self.read_value(field_type)
+
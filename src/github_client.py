@@ -0,0 +1,245 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.rate_limit import RateLimiter
+
+# Responses worth retrying once the server has had a moment
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GitHubError(ValueError):
+    """A GitHub request failed for good, after any retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class GitHubClient:
+    """GitHub REST client shared by everything that talks to GitHub.
+
+    - One keep-alive connection pool for all requests.
+    - GET responses are remembered with their ETag and revalidated with
+      If-None-Match; a 304 doesn't count against the rate limit.
+    - Rate-limit (403/429 with no remaining quota or a Retry-After) and 5xx
+      responses are retried with jittered exponential backoff, waiting for
+      Retry-After or X-RateLimit-Reset when GitHub gives one.
+    - The latest X-RateLimit-* headers are exposed through rate_limit.
+    """
+
+    def __init__(self, token: Optional[str], api_url: str = "https://api.github.com",
+                 raw_url: str = "https://raw.githubusercontent.com", pool_size: int = 8, limiter: Optional[RateLimiter] = None,
+                 max_retries: int = 5, backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 max_rate_limit_wait: float = 900.0, etag_cache_size: int = 1024):
+        self.token = token
+        self.api_url = api_url.rstrip('/')
+        self.raw_url = raw_url.rstrip('/')
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_rate_limit_wait = max_rate_limit_wait
+        self.etag_cache_size = etag_cache_size
+        self.requests_sent = 0
+        self.not_modified = 0
+        self.retries = 0
+        self.rate_limit = {'limit': None, 'remaining': None, 'reset': None}
+        self._etags = OrderedDict()  # url -> (etag, parsed body)
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def url(self, path_or_url: str) -> str:
+        if path_or_url.startswith(('http://', 'https://')):
+            return path_or_url
+        return f"{self.api_url}{path_or_url}"
+
+    def headers(self, accept: str = "application/vnd.github+json") -> Dict[str, str]:
+        headers = {"Accept": accept}
+        if self.token:
+            headers["Authorization"] = f"token {self.token}"
+        return headers
+
+    def request(self, path_or_url: str, headers: Optional[Dict[str, str]] = None,
+                stream: bool = False, timeout: float = 60, max_retries: Optional[int] = None,
+                deadline: Optional[float] = None) -> requests.Response:
+        """GET with retries on rate limiting and server errors; returns the final response.
+
+        max_retries overrides the client's own. deadline (a time.monotonic()
+        value) bounds every attempt and wait together: no attempt outlives
+        it and no retry starts that couldn't finish before it.
+        """
+        url = self.url(path_or_url)
+        headers = headers or self.headers()
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            attempt_timeout = timeout
+            if deadline is not None:
+                attempt_timeout = min(timeout, deadline - time.monotonic())
+                if attempt_timeout <= 0:
+                    raise requests.Timeout(f"Deadline passed before requesting {url}")
+            if self.limiter:
+                self.limiter.acquire()
+            try:
+                response = self.session.get(url, headers=headers, stream=stream,
+                                            timeout=attempt_timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self._backoff(attempt)
+                if attempt >= max_retries or not self._in_time(delay, deadline):
+                    raise
+                self._sleep_before_retry(delay)
+                attempt += 1
+                continue
+
+            with self._lock:
+                self.requests_sent += 1
+            self._record_rate_limit(response)
+            if not self._should_retry(response) or attempt >= max_retries:
+                return response
+
+            delay = self._retry_delay(response, attempt)
+            if delay > self.max_rate_limit_wait:
+                raise GitHubError(f"GitHub rate limit exhausted; resets in {delay:.0f}s",
+                                  response.status_code)
+            if not self._in_time(delay, deadline):
+                return response
+            response.close()
+            self._sleep_before_retry(delay)
+            attempt += 1
+
+    def get(self, path_or_url: str, accept: str = "application/vnd.github+json",
+            as_json: bool = True, conditional: bool = True) -> Any:
+        """GET a resource, returning parsed JSON (or text).
+
+        With conditional set the response goes through the ETag cache;
+        turn it off for immutable resources such as blobs that are cached
+        elsewhere.
+        """
+        url = self.url(path_or_url)
+        headers = self.headers(accept)
+        cached = None
+        if conditional:
+            with self._lock:
+                cached = self._etags.get(url)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+
+        response = self.request(url, headers)
+        if response.status_code == 304 and cached:
+            with self._lock:
+                self.not_modified += 1
+                self._etags.move_to_end(url)
+            return cached[1]
+        if response.status_code != 200:
+            raise GitHubError(f"GitHub request for {url} failed: {response.status_code}",
+                              response.status_code)
+
+        body = response.json() if as_json else response.text
+        etag = response.headers.get("ETag")
+        if conditional and etag:
+            with self._lock:
+                self._etags[url] = (etag, body)
+                self._etags.move_to_end(url)
+                while len(self._etags) > self.etag_cache_size:
+                    self._etags.popitem(last=False)
+        return body
+
+    def get_head_sha(self, owner: str, repo: str) -> str:
+        """Resolve the commit SHA at the head of the main branch"""
+        return self.get(f"/repos/{owner}/{repo}/commits/main",
+                        accept="application/vnd.github.sha", as_json=False).strip()
+
+    def raw_file_url(self, owner: str, repo: str, path: str, ref: str = "main") -> str:
+        return f"{self.raw_url}/{owner}/{repo}/{ref}/{quote(path)}"
+
+    def get_partial(self, url: str, max_bytes: int, tail: bool = False,
+                    timeout: float = 5.0) -> bytes:
+        """Read at most max_bytes from the start (or end) of a raw file within timeout seconds.
+
+        Asks for a byte range and stops reading at the limit even if the
+        server ignores it, so a multi-hundred-MB file costs one chunk. A
+        sniff is optional, so there are no retries: connecting, waiting for
+        the response and reading the body share the one timeout.
+        """
+        headers = self.headers("application/vnd.github.raw")
+        headers["Range"] = f"bytes=-{max_bytes}" if tail else f"bytes=0-{max_bytes - 1}"
+        deadline = time.monotonic() + timeout
+        with self.request(url, headers, stream=True, timeout=timeout, max_retries=0,
+                          deadline=deadline) as response:
+            if response.status_code not in (200, 206):
+                raise GitHubError(f"GitHub request for {url} failed: {response.status_code}",
+                                  response.status_code)
+            if tail and response.status_code == 200:
+                # Without range support the tail means reading the whole file
+                length = int(response.headers.get('Content-Length') or 0)
+                if not length or length > max_bytes:
+                    raise GitHubError(f"Ranged reads unsupported for {url}")
+            data = bytearray()
+            for chunk in response.iter_content(chunk_size=16 * 1024):
+                data.extend(chunk)
+                if len(data) >= max_bytes and not tail:
+                    break
+                if time.monotonic() > deadline:
+                    if tail:
+                        raise GitHubError(f"Timed out reading {url}")
+                    break
+        return bytes(data[-max_bytes:] if tail else data[:max_bytes])
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counters and the latest rate-limit budget"""
+        with self._lock:
+            return {'requests': self.requests_sent, 'not_modified': self.not_modified,
+                    'retries': self.retries, **self.rate_limit}
+
+    def _record_rate_limit(self, response: requests.Response) -> None:
+        values = {}
+        for key, header in (('limit', 'X-RateLimit-Limit'), ('remaining', 'X-RateLimit-Remaining'),
+                            ('reset', 'X-RateLimit-Reset')):
+            value = response.headers.get(header)
+            if value is not None and value.isdigit():
+                values[key] = int(value)
+        if values:
+            with self._lock:
+                self.rate_limit.update(values)
+
+    def _should_retry(self, response: requests.Response) -> bool:
+        if response.status_code in RETRY_STATUSES:
+            return True
+        # 403 also means "no permission"; only retry when it's the rate limit
+        return response.status_code == 403 and (
+            response.headers.get('X-RateLimit-Remaining') == '0'
+            or 'Retry-After' in response.headers
+        )
+
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return int(retry_after) + random.uniform(0, 1)
+        reset = response.headers.get('X-RateLimit-Reset')
+        if response.headers.get('X-RateLimit-Remaining') == '0' and reset and reset.isdigit():
+            return max(0, int(reset) - time.time()) + random.uniform(0, 1)
+        return self._backoff(attempt)
+
+    def _in_time(self, delay: float, deadline: Optional[float]) -> bool:
+        """Whether waiting delay seconds still leaves time before the deadline"""
+        return deadline is None or time.monotonic() + delay < deadline
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter, so retries from concurrent workers spread out
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _sleep_before_retry(self, delay: float) -> None:
+        with self._lock:
+            self.retries += 1
+        time.sleep(delay)
@@ -0,0 +1,118 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class Job:
+    """A single grading request and its outcome"""
+
+    def __init__(self, key: str, payload: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.payload = payload
+        self.status = QUEUED
+        self.results = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self._events_changed = threading.Condition()
+
+    def add_event(self, event: str, data: Dict[str, Any]) -> None:
+        """Record a progress event and wake anyone streaming this job"""
+        with self._events_changed:
+            self.events.append({'event': event, 'data': data})
+            self._events_changed.notify_all()
+
+    def wait_for_events(self, start: int, timeout: float) -> List[Dict[str, Any]]:
+        """Return events from index start on, waiting up to timeout for new ones"""
+        with self._events_changed:
+            self._events_changed.wait_for(lambda: len(self.events) > start, timeout)
+            return self.events[start:]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'jobId': self.id,
+            'status': self.status,
+            'data': self.results,
+            'error': self.error,
+            'createdAt': self.created_at,
+            'startedAt': self.started_at,
+            'finishedAt': self.finished_at
+        }
+
+
+class JobQueue:
+    """In-process grading queue worked by a fixed-size thread pool.
+
+    Submitting a job whose key (repository, commit and whether the grade
+    is forced) matches one that is still queued or running returns the existing job instead of grading the
+    same commit twice. Finished jobs are kept for job_ttl seconds so their
+    results can be polled.
+    """
+
+    def __init__(self, run_job: Callable[[Job], Dict[str, Any]], workers: int,
+                 job_ttl: float = 3600):
+        self.run_job = run_job
+        self.job_ttl = job_ttl
+        self.jobs = {}
+        self.active = {}  # key -> job id, for queued and running jobs
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers),
+                                            thread_name_prefix='grader-job')
+
+    def submit(self, key: str, payload: Dict[str, Any]) -> Tuple[Job, bool]:
+        """Queue a job, returning it and whether it was newly created"""
+        with self._lock:
+            self._prune()
+            existing = self.active.get(key)
+            if existing:
+                return self.jobs[existing], False
+            job = Job(key, payload)
+            self.jobs[job.id] = job
+            self.active[key] = job.id
+        self._executor.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.add_event(RUNNING, {})
+        try:
+            job.results = self.run_job(job)
+            job.status = COMPLETED
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self.active.pop(job.key, None)
+        if job.status == COMPLETED:
+            job.add_event(COMPLETED, job.results)
+        else:
+            job.add_event(FAILED, {'error': job.error})
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.job_ttl
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            del self.jobs[job_id]
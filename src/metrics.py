@@ -0,0 +1,77 @@
+import math
+import threading
+from typing import Dict, Tuple
+
+# Histogram bucket upper bounds, in seconds: from a cached tree fetch up
+# to a slow LLM call
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+class Metrics:
+    """Thread-safe counters, gauges and timing histograms for the whole process.
+
+    Rendered in the Prometheus text format by render(). Names ending in
+    _total are counters, anything else passed to set() is a gauge.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.values = {}      # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Record a value owned elsewhere, e.g. a cache's own hit counter"""
+        with self._lock:
+            self.values[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.setdefault(key, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+
+    def render(self) -> str:
+        """Everything recorded so far, in the Prometheus text exposition format"""
+        with self._lock:
+            values = sorted(self.values.items())
+            histograms = sorted((key, list(counts)) for key, counts in self.histograms.items())
+
+        lines = []
+        typed = set()
+        for (name, labels), value in values:
+            if name not in typed:
+                lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+                typed.add(name)
+            lines.append(f"{name}{format_labels(labels)} {value:g}")
+        for (name, labels), counts in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            for bound, count in zip((*self.buckets, math.inf), (*counts[:-2], counts[-1])):
+                le = '+Inf' if bound == math.inf else f'{bound:g}'
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {counts[-2]:g}")
+            lines.append(f"{name}_count{format_labels(labels)} {counts[-1]}")
+        return '\n'.join(lines) + '\n'
+
+
+# Shared by every grader in the process; app.py serves it at /metrics
+REGISTRY = Metrics()
@@ -0,0 +1,133 @@
+import re
+from typing import Dict, List, Tuple
+
+# Context window per model, in tokens
+MODEL_CONTEXT_TOKENS = {
+    'claude-3-opus-20240229': 200_000,
+    'claude-3-5-sonnet-20241022': 200_000,
+    'claude-3-5-haiku-20241022': 200_000,
+}
+DEFAULT_CONTEXT_TOKENS = 100_000
+
+# Room left in the context window for the graded response
+RESERVED_OUTPUT_TOKENS = 4_096
+
+# Claude averages a little over 3.5 characters per token on English
+CHARS_PER_TOKEN = 3.5
+
+# Dense R code and JSON run 15-30% more tokens than CHARS_PER_TOKEN
+# estimates, so prompts are packed to this fraction of the context window
+# to keep a pack built to the estimated limit from overflowing it
+ESTIMATE_SAFETY_FRACTION = 0.8
+
+# Lines a file can be split before without cutting a function or section
+# in half, by extension
+SPLIT_BOUNDARIES = {
+    'py': re.compile(r'^(def |class |async def |if __name__)'),
+    'r': re.compile(r'^([\w.]+\s*(<-|=)\s*function\b|#{1,4}\s*-{3,}|#{1,4}\s*={3,}|#### )'),
+    'md': re.compile(r'^#{1,6} '),
+    'qmd': re.compile(r'^#{1,6} '),
+    'rmd': re.compile(r'^#{1,6} '),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-leaning token estimate for a piece of text"""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def prompt_token_budget(model: str) -> int:
+    """Estimated tokens a prompt can take on the given model, with a margin for estimate error"""
+    context = MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS) - RESERVED_OUTPUT_TOKENS
+    return int(context * ESTIMATE_SAFETY_FRACTION)
+
+
+def format_file(path: str, content: str) -> str:
+    """Render a file the way every grading prompt lists it"""
+    return f"File: {path}\nContent:\n{content}"
+
+
+def split_sections(path: str, content: str) -> List[str]:
+    """Break a file before each function or section boundary its type has"""
+    boundary = SPLIT_BOUNDARIES.get(path.lower().split('.')[-1])
+    sections = []
+    current = []
+    for line in content.splitlines(keepends=True):
+        if boundary and boundary.match(line) and current:
+            sections.append(''.join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append(''.join(current))
+    return sections
+
+
+def split_file(path: str, content: str, budget: int) -> List[Tuple[str, str]]:
+    """Split a file into labelled parts that each fit the budget once formatted.
+
+    Parts break on function or section boundaries where the file type has
+    them, then on lines, and only as a last resort mid-line.
+    """
+    # Leave room for the "File: ... (part n of m)" header, the separator
+    # and estimate rounding
+    header = estimate_tokens(format_file(f"{path} (part 000 of 000)", ''))
+    part_budget = max(1, budget - header - 2)
+    max_chars = int(part_budget * CHARS_PER_TOKEN)
+    segments = split_sections(path, content)
+
+    # Segments still too big fall back to lines, and lines to fixed slices
+    pieces = []
+    for segment in segments:
+        if len(segment) <= max_chars:
+            pieces.append(segment)
+            continue
+        for line in segment.splitlines(keepends=True):
+            pieces.extend(line[i:i + max_chars] for i in range(0, len(line), max_chars))
+
+    parts = []
+    current = ''
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            parts.append(current)
+            current = ''
+        current += piece
+    if current:
+        parts.append(current)
+
+    if len(parts) == 1:
+        return [(path, parts[0])]
+    return [(f"{path} (part {i} of {len(parts)})", part) for i, part in enumerate(parts, 1)]
+
+
+def pack_files(files: Dict[str, str], budget: int) -> List[Dict[str, str]]:
+    """Bin-pack files into the fewest groups whose formatted size fits the budget.
+
+    Files too big for a group of their own are split first. Groups keep the
+    files' original order so prompts read the way the repository does.
+    """
+    if not files:
+        return []
+    budget = max(1, budget)
+
+    entries = []
+    for path, content in files.items():
+        if estimate_tokens(format_file(path, content)) > budget:
+            entries.extend(split_file(path, content, budget))
+        else:
+            entries.append((path, content))
+
+    # First-fit decreasing; the +1 accounts for the blank line between files
+    sizes = [estimate_tokens(format_file(path, content)) + 1 for path, content in entries]
+    bins = []  # [remaining budget, [entry indexes]]
+    for index in sorted(range(len(entries)), key=lambda i: -sizes[i]):
+        for packed in bins:
+            if sizes[index] <= packed[0]:
+                packed[0] -= sizes[index]
+                packed[1].append(index)
+                break
+        else:
+            bins.append([budget - sizes[index], [index]])
+
+    groups = [sorted(indexes) for _, indexes in bins]
+    groups.sort(key=lambda indexes: indexes[0])
+    return [{entries[i][0]: entries[i][1] for i in indexes} for indexes in groups]
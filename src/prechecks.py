@@ -0,0 +1,115 @@
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.config import COURSE_CODE_PATTERN
+from src.reduction import is_readme
+
+# Reference lists aren't sent to the LLM, but the checks below read them,
+# so files with these extensions are downloaded too
+REFERENCE_EXTENSIONS = ['bib']
+
+# Anything a README might call an LLM or an AI assistant
+LLM_MENTION = re.compile(
+    r'\b(LLMs?|large language models?|language models?|chat-?gpt\w*|gpt-?\w*|co-?pilot|claude|'
+    r'gemini|bard|chatbots?|generative (AI|tools?|models?)|AI|artificial intelligence)\b', re.I)
+
+# Reference-list entries for R itself or for Python
+SOFTWARE_CITATION = re.compile(
+    r'R Core Team|R: A Language and Environment|r-project\.org|'
+    r'Python Software Foundation|van Rossum|python\.org', re.I)
+
+COURSE_CODE = re.compile(COURSE_CODE_PATTERN, re.I)
+
+# Rules registered with @precheck, as (rubric item title, rule)
+PRECHECKS: List[Tuple[str, Callable]] = []
+
+
+def precheck(title: str) -> Callable:
+    """Register a rule for the rubric item with this title.
+
+    A rule takes every path in the repository mapped to its content (None
+    when it wasn't downloaded) and returns None when it has nothing to say,
+    {'fail': explanation} when the item definitely fails, or
+    {'hint': evidence} to pass to the LLM. A failure zeroes the paper
+    without an LLM call, so keep it for cases no wording could get wrong
+    and report anything a regular expression only suspects as a hint.
+    """
+    def register(rule: Callable[[Dict[str, Optional[str]]], Optional[Dict[str, str]]]) -> Callable:
+        PRECHECKS.append((title, rule))
+        return rule
+    return register
+
+
+def run_prechecks(files: Dict[str, Optional[str]],
+                  rules: Optional[List[Tuple[str, Callable]]] = None) -> Dict[str, Dict[str, Any]]:
+    """Run every rule; returns {'failures': {title: explanation}, 'hints': {title: [evidence]}}"""
+    results = {'failures': {}, 'hints': {}}
+    for title, rule in PRECHECKS if rules is None else rules:
+        outcome = rule(files)
+        if not outcome:
+            continue
+        if 'fail' in outcome:
+            results['failures'].setdefault(title, outcome['fail'])
+        else:
+            results['hints'].setdefault(title, []).append(outcome['hint'])
+    return results
+
+
+def extension(path: str) -> str:
+    return path.lower().split('.')[-1]
+
+
+@precheck('LLM usage documented')
+def readme_mentions_llm(files: Dict[str, Optional[str]]) -> Optional[Dict[str, str]]:
+    readmes = [path for path in files if '/' not in path and is_readme(path)]
+    if not readmes:
+        return {'fail': "There is no README at the top of the repository, so LLM usage "
+                        "can't be documented in it."}
+    if any(files[path] is None for path in readmes):
+        return None
+    for path in readmes:
+        for line in files[path].splitlines():
+            if LLM_MENTION.search(line):
+                return {'hint': f"{path} mentions LLMs: \"{line.strip()[:200]}\""}
+    return {'hint': f"No line of {', '.join(readmes)} uses a common name for LLMs or AI tools; "
+                    f"check whether it states LLM usage in other words."}
+
+
+@precheck('R/Python cited')
+def software_cited(files: Dict[str, Optional[str]]) -> Optional[Dict[str, str]]:
+    sources = [path for path in files
+               if extension(path) in REFERENCE_EXTENSIONS + ['qmd', 'rmd', 'md']]
+    if not sources:
+        return {'fail': "The repository has no reference list or document (.bib, .qmd, .Rmd "
+                        "or .md) that could cite R or Python."}
+    for path in sources:
+        match = files[path] and SOFTWARE_CITATION.search(files[path])
+        if match:
+            return {'hint': f"{path} contains \"{match.group(0)}\", which may be a citation of R/Python."}
+    if any(files[path] is None for path in sources):
+        return None  # Couldn't read everything, so can't say anything
+    return {'hint': "No reference list or document has a usual R or Python citation "
+                    "(\"R Core Team\", \"Python Software Foundation\" or similar); "
+                    "check for one in another form."}
+
+
+@precheck('Class paper')
+def course_code_in_names(files: Dict[str, Optional[str]]) -> Optional[Dict[str, str]]:
+    # Folder names, and .Rproj names without the extension
+    names = set()
+    for path in files:
+        parts = path.split('/')
+        names.update(parts[:-1])
+        if extension(path) == 'rproj':
+            names.add(parts[-1][:-len('.rproj')])
+    # Only a name that is nothing but a course code is certain; a code
+    # inside a longer name may be something else (a raster resolution, say)
+    for name in sorted(names):
+        match = COURSE_CODE.fullmatch(name)
+        if match:
+            return {'fail': f"\"{name}\" is the course code \"{match.group(0)}\"."}
+    for name in sorted(names):
+        match = COURSE_CODE.search(name)
+        if match:
+            return {'hint': f"\"{name}\" contains \"{match.group(0)}\", which may be a course code."}
+    return None
@@ -0,0 +1,30 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Thread-safe token bucket shared by everything calling one service.
+
+    acquire() blocks until a request may be sent, so a single limiter keeps
+    any number of concurrent graders under the service's rate limit.
+    """
+
+    def __init__(self, rate: float, per: float = 1.0, burst: int = 1):
+        self.interval = per / rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) / self.interval)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.interval
+            time.sleep(wait)
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, Optional
+
+from src.packing import estimate_tokens
+
+# Largest plain .txt file sent whole. These are usually logs or data dumps,
+# so cutting their middle loses little; papers and code are never cut (their
+# conclusions and final steps are what gets graded) and large ones go
+# through packing or retrieval instead
+MAX_TXT_CHARS = 20_000
+
+# Share of word shingles two documents must have in common to count as
+# copies of each other (e.g. paper.qmd and its rendered paper.md)
+NEAR_DUPLICATE_THRESHOLD = 0.8
+SHINGLE_SIZE = 5
+
+# When two documents are copies, keep the source format
+FORMAT_PREFERENCE = ['qmd', 'rmd', 'md', 'txt']
+
+
+def notebook_to_source(content: str) -> Optional[str]:
+    """Reduce a Jupyter notebook to its cell sources, dropping outputs.
+
+    Returns None if the content isn't notebook JSON.
+    """
+    try:
+        cells = json.loads(content)['cells']
+    except (ValueError, KeyError, TypeError):
+        return None
+    parts = []
+    for cell in cells:
+        source = cell.get('source', '')
+        if isinstance(source, list):
+            source = ''.join(source)
+        if not source.strip():
+            continue
+        if cell.get('cell_type') == 'code':
+            parts.append(f"# %%\n{source}")
+        else:
+            commented = '\n'.join(f"# {line}" for line in source.splitlines())
+            parts.append(f"# %% [{cell.get('cell_type', 'markdown')}]\n{commented}")
+    return '\n\n'.join(parts) + '\n'
+
+
+def truncate_text(content: str, max_chars: int) -> str:
+    """Keep the head and tail of an oversized text with a marker in between"""
+    if len(content) <= max_chars:
+        return content
+    head = content[:max_chars * 3 // 4]
+    tail = content[-(max_chars // 4):]
+    removed = len(content) - len(head) - len(tail)
+    return f"{head}\n\n[... truncated {removed} characters ...]\n\n{tail}"
+
+
+def shingles(content: str) -> set:
+    words = re.findall(r'\w+', content.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)}
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def is_readme(path: str) -> bool:
+    return path.split('/')[-1].lower().startswith('readme')
+
+
+def keep_order(path: str) -> tuple:
+    """Sort key for which copy of a duplicated file to keep: READMEs, then source formats, then shallower paths"""
+    ext = path.lower().split('.')[-1]
+    rank = FORMAT_PREFERENCE.index(ext) if ext in FORMAT_PREFERENCE else len(FORMAT_PREFERENCE)
+    return (not is_readme(path), rank, path.count('/'), path)
+
+
+def find_duplicates(files: Dict[str, str], near: bool) -> Dict[str, str]:
+    """Map each redundant path to the path of the copy being kept"""
+    duplicates = {}
+    kept = []  # (path, shingles) of files kept so far, best copies first
+    seen = {}
+    for path in sorted(files, key=keep_order):
+        content = files[path]
+        digest = hashlib.sha256(' '.join(content.split()).encode('utf-8')).hexdigest()
+        if digest in seen:
+            duplicates[path] = seen[digest]
+            continue
+        seen[digest] = path
+        if not near:
+            continue
+        own = shingles(content)
+        for other_path, other in kept:
+            # Skip pairs whose sizes rule out the threshold before comparing
+            if min(len(own), len(other)) < NEAR_DUPLICATE_THRESHOLD * max(len(own), len(other)):
+                continue
+            if len(own & other) / len(own | other) >= NEAR_DUPLICATE_THRESHOLD:
+                duplicates[path] = other_path
+                break
+        else:
+            kept.append((path, own))
+    # READMEs are always kept; the critical checks look for them by name
+    return {path: original for path, original in duplicates.items() if not is_readme(path)}
+
+
+def reduce_content(processed: Dict[str, Dict[str, Any]],
+                   max_txt_chars: int = MAX_TXT_CHARS,
+                   max_text_chars: Optional[int] = None) -> Dict[str, Any]:
+    """Shrink documentation and code in place before they go into prompts.
+
+    Notebooks are reduced to their cell sources, exact and near-duplicate
+    files are moved to 'other', and oversized .txt files are truncated to
+    their head and tail with an explicit marker. Other documents and code
+    are only truncated if max_text_chars is given. Returns what was done
+    and how much was saved.
+    """
+    sections = ('documentation', 'code')
+    bytes_before = sum(len(c.encode('utf-8')) for s in sections for c in processed[s].values())
+    tokens_before = sum(estimate_tokens(c) for s in sections for c in processed[s].values())
+    stats = {'notebooks_stripped': [], 'duplicates_removed': {}, 'truncated': []}
+
+    for path, content in list(processed['code'].items()):
+        if path.lower().endswith('.ipynb'):
+            source = notebook_to_source(content)
+            if source is not None:
+                processed['code'][path] = source
+                stats['notebooks_stripped'].append(path)
+
+    for section in sections:
+        duplicates = find_duplicates(processed[section], near=section == 'documentation')
+        for path, original in duplicates.items():
+            del processed[section][path]
+            processed['other'][path] = f"[File: {path}]"
+        stats['duplicates_removed'].update(duplicates)
+
+    for section in sections:
+        for path, content in processed[section].items():
+            limit = max_txt_chars if path.lower().endswith('.txt') else max_text_chars
+            if limit is not None and len(content) > limit:
+                processed[section][path] = truncate_text(content, limit)
+                stats['truncated'].append(path)
+
+    bytes_after = sum(len(c.encode('utf-8')) for s in sections for c in processed[s].values())
+    tokens_after = sum(estimate_tokens(c) for s in sections for c in processed[s].values())
+    stats.update(bytes_before=bytes_before, bytes_saved=bytes_before - bytes_after,
+                 tokens_before=tokens_before, tokens_saved=tokens_before - tokens_after)
+    return stats
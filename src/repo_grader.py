@@ -2,100 +2,469 @@ import json
 import os
 from langchain_anthropic import ChatAnthropic 
 from langchain_core.documents import Document
-import requests
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage
 import base64
 import fnmatch
-from typing import Dict, List, Any
+import hashlib
+import io
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Any, BinaryIO, Callable, Iterator, Optional, Tuple
 from datetime import datetime
 import anthropic
-from src.config import GITHUB_API_TOKEN, ANTHROPIC_API_TOKEN
+from src.blob_cache import BlobCache
+from src.data_sniffer import inspect_data_file, read_tail
+from src.github_client import GitHubClient, GitHubError
+from src.metrics import REGISTRY, Metrics
+from src.rate_limit import RateLimiter
+from src.prechecks import PRECHECKS, REFERENCE_EXTENSIONS, run_prechecks
+from src.packing import estimate_tokens, format_file, pack_files, prompt_token_budget
+from src.reduction import reduce_content
+from src.result_cache import ResultCache, SQLiteResultCache
+from src.retrieval import RetrievalIndex
+from src.streaming import ItemStreamParser, chunk_text
+from src.config import (GITHUB_API_TOKEN, ANTHROPIC_API_TOKEN, FETCH_CONCURRENCY, REPO_SOURCE,
+                        MAX_BLOB_BYTES, BLOB_CACHE_DIR, BLOB_CACHE_MAX_BYTES, RESULT_CACHE_PATH,
+                        LLM_CONCURRENCY, PROMPT_TOKEN_BUDGET, ROSTER_WORKERS,
+                        GITHUB_REQUESTS_PER_SECOND, LLM_REQUESTS_PER_MINUTE, GITHUB_API_URL,
+                        GITHUB_RAW_URL, DATA_SNIFF_MAX_BYTES, DATA_SNIFF_TIMEOUT,
+                        INCREMENTAL_REGRADING, RETRIEVAL_MIN_TOKENS, RETRIEVAL_ITEM_TOKENS)
+
+MODEL_NAME = "claude-3-opus-20240229"
+
+# Bump whenever a prompt template or the batching changes, so cached
+# results graded under the old prompts are no longer served. Settings that
+# change the prompts are added to it per grader (see RepoGrader.prompt_version)
+PROMPT_VERSION = "6"
+
+DOCUMENTATION_EXTENSIONS = ['md', 'qmd', 'rmd', 'txt']
+CODE_EXTENSIONS = ['py', 'r', 'ipynb']
+DATA_EXTENSIONS = ['csv', 'parquet', 'json', 'xlsx', 'xls', 'dta', 'sav', 'dat']
+
+# Categories whose file contents are sent to the LLM; everything else is
+# reduced to metadata or a placeholder by preprocess_repo_content
+CONTENT_CATEGORIES = ['documentation', 'code']
+
+# What each batch's grades depend on, as classify_file categories plus
+# 'structure' (files added, removed or renamed). When regrading a new
+# commit, a batch whose inputs are unchanged keeps its previous grades.
+# The critical prompt includes the code, and "Class paper" looks for signs
+# of a class project in code comments, so critical depends on code too.
+BATCH_DEPENDENCIES = {
+    'critical': {'documentation', 'code', 'structure'},
+    'document': {'documentation'},
+    'technical': {'code', 'data_metadata'},
+    'remaining': {'documentation', 'data_metadata', 'structure'}
+}
 
 class RepoGrader:
-    def __init__(self, github_token: str, anthropic_api_key: str, rubric_path: str):
+    def __init__(self, github_token: str, anthropic_api_key: str, rubric_path: str,
+                 fetch_concurrency: int = FETCH_CONCURRENCY, source: str = REPO_SOURCE,
+                 max_blob_size: int = MAX_BLOB_BYTES, blob_cache: Optional[BlobCache] = None,
+                 result_cache: Optional[ResultCache] = None,
+                 llm_concurrency: int = LLM_CONCURRENCY,
+                 prompt_budget: Optional[int] = PROMPT_TOKEN_BUDGET,
+                 progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 github_limiter: Optional[RateLimiter] = None,
+                 llm_limiter: Optional[RateLimiter] = None,
+                 github_client: Optional[GitHubClient] = None,
+                 data_sniff_bytes: int = DATA_SNIFF_MAX_BYTES,
+                 data_sniff_timeout: float = DATA_SNIFF_TIMEOUT,
+                 metrics: Optional[Metrics] = None,
+                 llm: Optional[BaseChatModel] = None,
+                 incremental: bool = INCREMENTAL_REGRADING,
+                 prechecks: Optional[List[Tuple[str, Callable]]] = None,
+                 retrieval_min_tokens: int = RETRIEVAL_MIN_TOKENS,
+                 retrieval_item_tokens: int = RETRIEVAL_ITEM_TOKENS):
+        if source not in ('api', 'archive'):
+            raise ValueError(f"Unknown repository source: {source}")
         self.github_token = github_token
-        self.llm = ChatAnthropic(
-            model="claude-3-opus-20240229",
+        self.source = source
+        self.max_blob_size = max_blob_size
+        self.blob_cache = blob_cache
+        self.result_cache = result_cache
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.progress_callback = progress_callback
+        self.llm_limiter = llm_limiter
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self.data_sniff_bytes = data_sniff_bytes
+        self.incremental = incremental
+        # Deterministic rules run before the critical batch; pass [] to skip them
+        self.prechecks = PRECHECKS if prechecks is None else prechecks
+        self.data_sniff_timeout = data_sniff_timeout
+        self.retrieval_min_tokens = retrieval_min_tokens
+        self.retrieval_item_tokens = retrieval_item_tokens
+        # One keep-alive pool shared by every GitHub request, sized so each
+        # fetch worker can hold its own connection
+        self.github = github_client or GitHubClient(github_token, api_url=GITHUB_API_URL,
+                                                    raw_url=GITHUB_RAW_URL,
+                                                    pool_size=self.fetch_concurrency,
+                                                    limiter=github_limiter)
+        self.model_name = MODEL_NAME
+        self.prompt_token_budget = prompt_budget or prompt_token_budget(self.model_name)
+        # Results and snapshots are cached under this, so changing a setting
+        # that changes what the prompts contain regrades instead of serving
+        # results built from different prompts
+        prompt_settings = json.dumps({
+            'prompt_token_budget': self.prompt_token_budget,
+            'max_blob_size': self.max_blob_size,
+            'data_sniff_bytes': self.data_sniff_bytes,
+            'retrieval_min_tokens': self.retrieval_min_tokens,
+            'retrieval_item_tokens': self.retrieval_item_tokens
+        }, sort_keys=True)
+        self.prompt_version = (f"{PROMPT_VERSION}-"
+                               f"{hashlib.sha256(prompt_settings.encode()).hexdigest()[:12]}")
+        self.llm_calls = []
+        self._llm_calls_lock = threading.Lock()
+        # Per-repository stage timings (seconds) and counters, also added
+        # to the process-wide metrics registry
+        self.metrics = metrics or REGISTRY
+        self.timings = {}
+        self.counters = {}
+        self._stats_lock = threading.Lock()
+        self.llm = llm or ChatAnthropic(
+            model=self.model_name,
             anthropic_api_key=anthropic_api_key,
             temperature=0.3
         )
-        with open(rubric_path, 'r') as f:
-            self.rubric = json.load(f)['rubric_items']
+        with open(rubric_path, 'rb') as f:
+            rubric_bytes = f.read()
+        self.rubric = json.loads(rubric_bytes)['rubric_items']
+        self.rubric_hash = hashlib.sha256(rubric_bytes).hexdigest()
+
+    def emit(self, event: str, **data: Any) -> None:
+        """Report a grading stage to the progress callback, if there is one"""
+        if self.progress_callback:
+            self.progress_callback(event, data)
+
+    @contextmanager
+    def timed(self, stage: str, batch: Optional[str] = None) -> Iterator[None]:
+        """Time a grading stage into self.timings and the stage-duration histogram.
+
+        Repeated stages (one per LLM call, say) add up, so a timing is the
+        total time spent in that stage, not wall-clock time.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            key = f"{batch}_{stage}" if batch else stage
+            with self._stats_lock:
+                self.timings[key] = self.timings.get(key, 0) + elapsed
+            labels = {'stage': stage, **({'batch': batch} if batch else {})}
+            self.metrics.observe('grader_stage_seconds', elapsed, **labels)
+
+    def count(self, name: str, value: int = 1, **labels: str) -> None:
+        """Add to a per-repository counter and its process-wide grader_<name>_total"""
+        if not value:
+            return
+        with self._stats_lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        self.metrics.inc(f"grader_{name}_total", value, **labels)
 
     def get_repo_contents(self, owner: str, repo: str) -> List[Dict[str, Any]]:
         """Fetch all contents from a GitHub repository"""
-        url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/main?recursive=1"
-        headers = {
-            "Authorization": f"token {self.github_token}",
-            "Accept": "application/vnd.github+json"
-        }
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            return response.json()["tree"]
-        else:
-            raise ValueError(f"Error fetching repo contents: {response.status_code}")
+        return self.get_repo_tree(owner, repo)["tree"]
 
-    def fetch_file_content(self, url: str) -> str:
-        """Fetch and decode content of a single file"""
-        headers = {
-            "Authorization": f"token {self.github_token}",
-            "Accept": "application/vnd.github+json"
-        }
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            content = response.json()["content"]
+    def get_repo_tree(self, owner: str, repo: str) -> Dict[str, Any]:
+        """Fetch the recursive tree response, including the tree's own SHA"""
+        return self.github.get(f"/repos/{owner}/{repo}/git/trees/main?recursive=1")
+
+    def fetch_file_content(self, url: str, sha: Optional[str] = None) -> str:
+        """Fetch and decode content of a single file, going through the blob cache when a SHA is given"""
+        if self.blob_cache and sha:
+            cached = self.blob_cache.get(sha)
+            if cached is not None:
+                self.count('blob_cache_hits')
+                return cached
+
+        content = self.github.get(url, conditional=False)["content"]
+        self.count('bytes_fetched', len(content))
+        try:
+            decoded = base64.b64decode(content).decode('utf-8')
+        except UnicodeDecodeError:
+            decoded = "[Binary file content]"
+        if self.blob_cache and sha:
+            self.blob_cache.put(sha, decoded)
+        return decoded
+
+    def fetch_files(self, blobs: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Fetch many blobs concurrently, keyed by path in tree order"""
+        urls = [blob["url"] for blob in blobs]
+        shas = [blob.get("sha") for blob in blobs]
+        with ThreadPoolExecutor(max_workers=self.fetch_concurrency) as executor:
+            contents = executor.map(self.fetch_file_content, urls, shas)
+            return {blob["path"]: content for blob, content in zip(blobs, contents)}
+
+    def inspect_data_files(self, owner: str, repo: str,
+                           file_sizes: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+        """Describe every data file concurrently from ranged reads of the raw file"""
+        paths = [path for path in file_sizes if self.classify_file(path) == 'data_metadata']
+
+        def inspect(path: str) -> Dict[str, Any]:
+            url = self.github.raw_file_url(owner, repo, path)
+
+            def read(n: int, tail: bool = False) -> bytes:
+                data = self.github.get_partial(url, n, tail=tail, timeout=self.data_sniff_timeout)
+                self.count('bytes_fetched', len(data))
+                return data
+
+            return inspect_data_file(path, file_sizes[path], read,
+                                     lambda n: read(n, tail=True), self.data_sniff_bytes)
+
+        with ThreadPoolExecutor(max_workers=self.fetch_concurrency) as executor:
+            return dict(zip(paths, executor.map(inspect, paths)))
+
+    def download_repo_archive(self, owner: str, repo: str
+                              ) -> Tuple[Dict[str, Optional[str]], Dict[str, int], Dict[str, Dict[str, Any]]]:
+        """Download the repository tarball once and extract it in memory"""
+        with self.github.request(f"/repos/{owner}/{repo}/tarball/main", stream=True) as response:
+            if response.status_code != 200:
+                raise GitHubError(f"Error downloading repo archive: {response.status_code}",
+                                  response.status_code)
+            response.raw.decode_content = True
+            extracted = self.extract_archive(response.raw)
+            self.count('bytes_fetched', response.raw.tell())
+            return extracted
+
+    def extract_archive(self, fileobj: BinaryIO, archive_format: str = 'tarball'
+                        ) -> Tuple[Dict[str, Optional[str]], Dict[str, int], Dict[str, Dict[str, Any]]]:
+        """Read a GitHub tarball or zipball, decoding only files whose content is kept.
+
+        Returns the same path -> content mapping as fetch_files, every
+        file's size, and what inspect_data_file found in each data file.
+        Files that preprocess_repo_content reduces to metadata map to None.
+        """
+        repo_files = {}
+        file_sizes = {}
+        data_details = {}
+
+        def add_member(name: str, size: int, open_member) -> None:
+            # GitHub archives nest everything under "<owner>-<repo>-<sha>/"
+            path = name.split('/', 1)[1] if '/' in name else ''
+            if not path:
+                return
+            file_sizes[path] = size
+            if self.classify_file(path) == 'data_metadata':
+                member = open_member()
+                data_details[path] = inspect_data_file(
+                    path, size, member.read, lambda n: read_tail(member, n),
+                    self.data_sniff_bytes)
+            if not self.should_fetch(path, size):
+                repo_files[path] = None
+                return
             try:
-                return base64.b64decode(content).decode('utf-8')
+                repo_files[path] = open_member().read().decode('utf-8')
             except UnicodeDecodeError:
-                return "[Binary file content]"
-        return ""
+                repo_files[path] = "[Binary file content]"
+
+        if archive_format == 'zipball':
+            # Zip needs a seekable file, so buffer it
+            with zipfile.ZipFile(io.BytesIO(fileobj.read())) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        add_member(info.filename, info.file_size,
+                                   lambda info=info: archive.open(info))
+        elif archive_format == 'tarball':
+            # Stream mode reads each member once, in order, without seeking
+            with tarfile.open(fileobj=fileobj, mode='r|*') as archive:
+                for member in archive:
+                    if member.isfile():
+                        add_member(member.name, member.size,
+                                   lambda member=member: archive.extractfile(member))
+        else:
+            raise ValueError(f"Unknown archive format: {archive_format}")
+
+        return repo_files, file_sizes, data_details
+
+    def plan_repo_fetch(self, tree: List[Dict[str, Any]]
+                        ) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[str]], Dict[str, int]]:
+        """Decide from the tree listing alone which blobs need downloading.
+
+        Returns the blobs to fetch, a repo_files mapping with every blob set
+        to None (to be filled in by fetch_files), and each blob's size.
+        """
+        blobs_to_fetch = []
+        repo_files = {}
+        file_sizes = {}
+        for entry in tree:
+            if entry["type"] != "blob":
+                continue
+            path = entry["path"]
+            size = entry.get("size", 0)
+            repo_files[path] = None
+            file_sizes[path] = size
+            if self.should_fetch(path, size):
+                blobs_to_fetch.append(entry)
+        return blobs_to_fetch, repo_files, file_sizes
+
+    def should_fetch(self, path: str, size: int) -> bool:
+        """Only documentation, code and reference lists under the size cap are worth downloading"""
+        return ((self.classify_file(path) in CONTENT_CATEGORIES
+                 or path.lower().split('.')[-1] in REFERENCE_EXTENSIONS)
+                and size <= self.max_blob_size)
+
+    def classify_file(self, path: str) -> str:
+        """Return the preprocess_repo_content category a path belongs to"""
+        ext = path.lower().split('.')[-1]
+        if ext in DOCUMENTATION_EXTENSIONS:
+            return 'documentation'
+        if ext in CODE_EXTENSIONS:
+            return 'code'
+        if ext in DATA_EXTENSIONS:
+            return 'data_metadata'
+        return 'other'
 
-    def preprocess_repo_content(self, repo_files: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
-        """Group repository content by type, storing only metadata for data files"""
+    def changed_categories(self, old_files: Dict[str, str], new_files: Dict[str, str]) -> set:
+        """Categories (and 'structure') touched between two path -> blob SHA listings"""
+        changed = set()
+        for path in old_files.keys() | new_files.keys():
+            if old_files.get(path) == new_files.get(path):
+                continue
+            if path not in old_files or path not in new_files:
+                changed.add('structure')
+            if path.lower().split('.')[-1] in REFERENCE_EXTENSIONS:
+                changed.add('documentation')  # The pre-checks read reference lists
+            else:
+                changed.add(self.classify_file(path))
+        return changed
+
+    def preprocess_repo_content(self, repo_files: Dict[str, Optional[str]],
+                                file_sizes: Optional[Dict[str, int]] = None,
+                                data_details: Optional[Dict[str, Dict[str, Any]]] = None
+                                ) -> Dict[str, Dict[str, Any]]:
+        """Group repository content by type, storing only metadata for data files.
+
+        A content of None means the file was listed but not downloaded; its
+        size, if known, comes from file_sizes. Documentation or code skipped
+        for being over the size cap is listed with the other files. Anything
+        inspect_data_file found (columns, row count) is added to a data
+        file's metadata from data_details.
+        """
         processed = {
             'documentation': {},  # .md, .qmd, .Rmd, etc
             'code': {},          # .py, .R, etc
             'data_metadata': {}, # Only metadata for data files
             'other': {}          # Everything else
         }
+        file_sizes = file_sizes or {}
+        data_details = data_details or {}
         
         for path, content in repo_files.items():
-            if not content:
+            category = self.classify_file(path)
+            if content is None:
+                if category in CONTENT_CATEGORIES:
+                    category = 'other'
+            elif not content:
                 continue
                 
             ext = path.lower().split('.')[-1]
             
-            if ext in ['md', 'qmd', 'rmd', 'txt']:
-                processed['documentation'][path] = content
-            elif ext in ['py', 'r', 'ipynb']:
-                processed['code'][path] = content
-            elif ext in ['csv', 'parquet', 'json', 'xlsx', 'xls', 'dta', 'sav', 'dat']:
+            if category in CONTENT_CATEGORIES:
+                processed[category][path] = content
+            elif category == 'data_metadata':
                 # Store only metadata for data files
                 processed['data_metadata'][path] = {
                     'path': path,
-                    'size': len(content),
+                    'size': file_sizes.get(path, len(content or '')),
                     'extension': ext,
-                    'directory': '/'.join(path.split('/')[:-1]) or '.'
+                    'directory': '/'.join(path.split('/')[:-1]) or '.',
+                    **data_details.get(path, {})
                 }
             else:
                 processed['other'][path] = f"[File: {path}]"
                 
         return processed
 
-    def analyze_repo(self, owner: str, repo: str) -> Dict[str, Any]:
-        """Analyze repository with optimized LLM usage"""
+    def analyze_repo(self, owner: str, repo: str, force_regrade: bool = False) -> Dict[str, Any]:
+        """Analyze repository with optimized LLM usage, reporting per-stage timings and counters"""
+        self.timings = {}
+        self.counters = {}
+        with self.timed('total'):
+            results = self.run_analysis(owner, repo, force_regrade)
+        results['timings'] = dict(self.timings)
+        results['counters'] = dict(self.counters)
+        return results
+
+    def run_analysis(self, owner: str, repo: str, force_regrade: bool) -> Dict[str, Any]:
         print(f"Fetching repository contents for {owner}/{repo}...")
-        contents = self.get_repo_contents(owner, repo)
-        repo_files = {}
-        
-        print("Processing files...")
-        for file in contents:
-            if file["type"] == "blob":
-                repo_files[file["path"]] = self.fetch_file_content(file["url"])
+        with self.timed('tree_fetch'):
+            tree = self.get_repo_tree(owner, repo)
+        self.emit('tree_fetched', files=sum(1 for entry in tree["tree"] if entry["type"] == "blob"))
+        cache_key = (tree["sha"], self.rubric_hash, self.model_name, self.prompt_version)
+        if self.result_cache and not force_regrade:
+            cached = self.result_cache.get(*cache_key)
+            if cached is not None:
+                print("Returning cached results for this commit")
+                self.count('result_cache_hits')
+                cached['cached'] = True
+                return cached
+            self.count('result_cache_misses')
+
+        files = {entry["path"]: entry["sha"] for entry in tree["tree"] if entry["type"] == "blob"}
+        reuse = {}
+        if self.incremental and self.result_cache and not force_regrade:
+            snapshot = self.result_cache.get_snapshot(f"{owner}/{repo}", self.rubric_hash,
+                                                      self.model_name, self.prompt_version)
+            if snapshot:
+                changed = self.changed_categories(snapshot['files'], files)
+                reuse = {batch: batch_results for batch, batch_results in snapshot['batches'].items()
+                         if not BATCH_DEPENDENCIES[batch] & changed}
+                print(f"Changed since the last graded tree: {', '.join(sorted(changed)) or 'nothing'}; "
+                      f"reusing {', '.join(reuse) or 'no'} batches")
 
-        processed_content = self.preprocess_repo_content(repo_files)
+        if self.source == 'archive':
+            with self.timed('archive_fetch'):
+                repo_files, file_sizes, data_details = self.download_repo_archive(owner, repo)
+        else:
+            contents = tree["tree"]
+            blobs, repo_files, file_sizes = self.plan_repo_fetch(contents)
+            
+            print(f"Processing files ({len(blobs)} of {len(repo_files)} need downloading)...")
+            with self.timed('blob_fetch'):
+                repo_files.update(self.fetch_files(blobs))
+            with self.timed('data_inspect'):
+                data_details = self.inspect_data_files(owner, repo, file_sizes)
+            print(f"Inspected {len(data_details)} data files")
+            if self.blob_cache:
+                stats = self.blob_cache.stats()
+                print(f"Blob cache: {stats['hits']} hits, {stats['misses']} misses")
+        print(f"GitHub rate limit remaining: {self.github.rate_limit['remaining']}")
+
+        with self.timed('prechecks'):
+            precheck_results = run_prechecks(repo_files, self.prechecks)
+        for title, explanation in precheck_results['failures'].items():
+            print(f"Pre-check failed {title}: {explanation}")
+
+        downloaded = sum(1 for content in repo_files.values() if content is not None)
+        self.count('files_downloaded', downloaded)
+        self.count('files_skipped', len(repo_files) - downloaded)
+
+        with self.timed('preprocess'):
+            processed_content = self.preprocess_repo_content(repo_files, file_sizes, data_details)
+            reduction = reduce_content(processed_content)
+        print(f"Reduced prompt content by {reduction['bytes_saved']} bytes "
+              f"(~{reduction['tokens_saved']} tokens): {len(reduction['notebooks_stripped'])} notebooks "
+              f"stripped, {len(reduction['duplicates_removed'])} duplicates removed, "
+              f"{len(reduction['truncated'])} files truncated")
+        self.emit('files_fetched',
+                  downloaded=downloaded,
+                  **{category: len(files) for category, files in processed_content.items()})
         
         print("Starting grading process...")
-        results = self.batch_grade_rubric(processed_content)
+        results = self.batch_grade_rubric(processed_content, reuse, precheck_results)
+        results['content_reduction'] = reduction
+        results['prechecks'] = precheck_results
+        if self.result_cache and results['grades']:
+            self.result_cache.set(f"{owner}/{repo}", *cache_key, results)
+            self.result_cache.set_snapshot(f"{owner}/{repo}", self.rubric_hash, self.model_name,
+                                           self.prompt_version, tree["sha"], files, results['batches'])
         
         return results
 
@@ -107,78 +476,269 @@ class RepoGrader:
                 f"Maximum points: {item['range']['max']}\n"
                 f"Is critical: {item.get('critical', False)}")
 
-    def batch_grade_rubric(self, processed_content: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
-        """Grade rubric items in strategic batches"""
+    def batch_grade_rubric(self, processed_content: Dict[str, Dict[str, str]],
+                           reuse: Optional[Dict[str, Dict[str, Any]]] = None,
+                           prechecks: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Grade rubric items in strategic batches.
+
+        reuse maps batch names to results from an earlier grade whose inputs
+        haven't changed; those batches are not sent to the LLM again.
+        prechecks is the output of run_prechecks: a definitive failure of a
+        critical item ends grading without any LLM call, and its hints go
+        into the critical prompt.
+        """
         results = {
             'grades': {},
-            'explanations': {}
+            'explanations': {},
+            'batches': {}
         }
+        self.llm_calls = []
+        reuse = reuse or {}
+        index = None
         
         # First batch: Critical requirements
         print("Grading critical requirements...")
         critical_items = [item for item in self.rubric if item.get('critical', False)]
-        critical_results = self.grade_critical_batch(critical_items, processed_content)
+        reused = {'critical': self.reused_batch('critical', critical_items, reuse)}
+        critical_results = reused['critical']
+        critical_titles = [item['title'] for item in critical_items]
+        prechecks = prechecks or {}
+        failures = {title: explanation for title, explanation in prechecks.get('failures', {}).items()
+                    if title in critical_titles}
+        if critical_results is None and failures:
+            critical_results = {
+                'grades': {title: 0 for title in failures},
+                'explanations': {title: f"Automated check: {explanation}"
+                                 for title, explanation in failures.items()}
+            }
+            self.emit('grading_planned', critical=0)
+        elif critical_results is None:
+            hints = {title: evidence for title, evidence in prechecks.get('hints', {}).items()
+                     if title in critical_titles}
+            index = self.build_retrieval_index(processed_content)
+            critical_prompts = self.build_critical_prompts(critical_items, processed_content, hints, index)
+            self.emit('grading_planned', critical=len(critical_prompts))
+            # The critical items are always graded in one call, so a
+            # failing item can stop generation right away
+            critical_results = self.grade_prompt(critical_prompts[0], 'critical', stop_on_fail=True)
+        else:
+            self.emit('grading_planned', critical=0)
         results['grades'].update(critical_results['grades'])
         results['explanations'].update(critical_results['explanations'])
+        results['batches']['critical'] = {'items': critical_titles, **critical_results}
         
         if any(grade == 0 for grade in critical_results['grades'].values()):
             print("Critical requirement failed - stopping grading process")
+            self.emit('critical_failed', **critical_results)
+            results['total_score'] = self.calculate_total_score(results['grades'])
+            results['llm_calls'] = self.llm_calls
+            results['reused_batches'] = ['critical'] if reused['critical'] else []
             return results
             
-        # Second batch: Document structure and content
-        print("Grading document structure and content...")
+        # Document structure and content
         doc_items = [item for item in self.rubric 
                     if not item.get('critical', False) and 
                     item['title'].lower() in ['abstract', 'introduction', 'data', 'results', 
                                             'discussion', 'title', 'prose', 'author, date, and repo']]
-        doc_results = self.grade_document_batch(doc_items, processed_content)
-        results['grades'].update(doc_results['grades'])
-        results['explanations'].update(doc_results['explanations'])
         
-        # Third batch: Technical implementation
-        print("Grading technical implementation...")
+        # Technical implementation, one call per pack of code files
         tech_items = [item for item in self.rubric 
                      if not item.get('critical', False) and 
                      item['title'].lower() in ['model', 'simulation', 'tests-simulation', 
                                              'tests-actual', 'reproducible workflow']]
-        tech_results = self.grade_technical_batch(tech_items, processed_content)
-        results['grades'].update(tech_results['grades'])
-        results['explanations'].update(tech_results['explanations'])
+        tech_prompts = self.build_technical_prompts(tech_items, processed_content)
+        if not tech_prompts:
+            tech_items = []
         
-        # Fourth batch: Everything else
+        # Everything else; with no code to look at, the technical items are
+        # graded from the repository structure too
+        batched_titles = {item['title'] for item in critical_items + doc_items + tech_items}
         remaining_items = [item for item in self.rubric 
-                         if item['title'] not in results['grades']]
-        if remaining_items:
-            print("Grading remaining items...")
-            remaining_results = self.grade_remaining_batch(remaining_items, processed_content)
-            results['grades'].update(remaining_results['grades'])
-            results['explanations'].update(remaining_results['explanations'])
+                         if item['title'] not in batched_titles]
+        
+        batch_items = {'document': doc_items, 'technical': tech_items, 'remaining': remaining_items}
+        reused.update({batch: self.reused_batch(batch, items, reuse)
+                       for batch, items in batch_items.items()})
+        if index is None and (reused['document'] is None
+                              or remaining_items and reused['remaining'] is None):
+            index = self.build_retrieval_index(processed_content)
+        batch_prompts = {
+            'document': (self.build_document_prompts(doc_items, processed_content, index)
+                         if reused['document'] is None else []),
+            'technical': tech_prompts if reused['technical'] is None else [],
+            'remaining': (self.build_remaining_prompts(remaining_items, processed_content, index)
+                          if remaining_items and reused['remaining'] is None else [])
+        }
+        
+        self.emit('grading_planned', **{batch: len(prompts) for batch, prompts in batch_prompts.items()})
+        
+        # The remaining batches don't depend on each other, so send them all
+        # at once and merge in a fixed order once every call has returned
+        print(f"Grading document ({len(batch_prompts['document'])} calls), "
+              f"technical ({len(batch_prompts['technical'])} calls) and remaining items "
+              f"({len(batch_prompts['remaining'])} calls) with up to {self.llm_concurrency} concurrent calls...")
+        with ThreadPoolExecutor(max_workers=self.llm_concurrency) as executor:
+            batch_futures = {
+                batch: [executor.submit(self.grade_prompt, prompt, batch) for prompt in prompts]
+                for batch, prompts in batch_prompts.items()
+            }
+            batch_results = {batch: reused[batch] or self.merge_chunk_results([f.result() for f in futures])
+                             for batch, futures in batch_futures.items()}
+        
+        for batch, batch_result in batch_results.items():
+            results['grades'].update(batch_result['grades'])
+            results['explanations'].update(batch_result['explanations'])
+            results['batches'][batch] = {'items': [item['title'] for item in batch_items[batch]],
+                                         **batch_result}
         
         # Calculate total score
         results['total_score'] = self.calculate_total_score(results['grades'])
+        results['llm_calls'] = self.llm_calls
+        results['reused_batches'] = [batch for batch, batch_result in reused.items()
+                                     if batch_result is not None]
         
         return results
 
+    def reused_batch(self, batch: str, items: List[Dict],
+                     reuse: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Earlier results for a batch, if there are any and they cover exactly these items"""
+        previous = reuse.get(batch)
+        if not items or not previous or previous['items'] != [item['title'] for item in items]:
+            return None
+        batch_results = {'grades': previous['grades'], 'explanations': previous['explanations']}
+        self.emit('batch_result', batch=batch, reused=True, **batch_results)
+        return batch_results
+
+    def format_files(self, files: Dict[str, str]) -> str:
+        """List files in a prompt"""
+        return "\n\n".join(format_file(path, content) for path, content in files.items())
+
+    def format_repo_structure(self, content: Dict[str, Dict[str, Any]]) -> str:
+        """Summarize every file in the repository for a prompt"""
+        return json.dumps({
+            'documentation_files': list(content['documentation'].keys()),
+            'code_files': list(content['code'].keys()),
+            'data_files': content['data_metadata'],
+            'other_files': list(content['other'].keys())
+        }, indent=2)
+
+    def build_repo_prefixes(self, content: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Build the repository-content prompt prefixes shared by every batch.
+
+        Each prefix holds the repository structure and one pack of the
+        documentation; usually everything fits in a single prefix. The
+        prefixes depend only on the repository, so they are byte-identical
+        across batches and the API can cache them between calls.
+        """
+        prefix = """You are grading an academic paper and the GitHub repository that produces it.
+
+Repository structure:
+{repo_structure}
+
+Documentation files{part}:
+{docs}"""
+        
+        repo_structure = self.format_repo_structure(content)
+        # Keep room for the longest batch instructions: every rubric item
+        # plus the surrounding template text
+        instructions_reserve = estimate_tokens("\n\n".join(
+            self.format_rubric_item(item) for item in self.rubric)) + 1000
+        overhead = estimate_tokens(prefix.format(repo_structure=repo_structure,
+                                                 part=' (part 00 of 00)', docs=''))
+        available = self.prompt_token_budget - overhead - instructions_reserve
+        if available <= 0:
+            raise ValueError(f"Repository structure alone is ~{overhead} tokens, "
+                             f"over the {self.prompt_token_budget} token budget")
+        
+        groups = pack_files(content['documentation'], available) or [{}]
+        return [prefix.format(repo_structure=repo_structure,
+                              part=f" (part {i} of {len(groups)})" if len(groups) > 1 else '',
+                              docs=self.format_files(group))
+                for i, group in enumerate(groups, 1)]
+
+    def retrieves(self, content: Dict[str, Dict[str, Any]], categories: List[str]) -> bool:
+        """Whether a batch that sees these categories gets retrieved excerpts instead of every file"""
+        size = sum(estimate_tokens(text) for category in categories
+                   for text in content[category].values())
+        return bool(self.retrieval_min_tokens) and size > self.retrieval_min_tokens
+
+    def build_retrieval_index(self, content: Dict[str, Dict[str, Any]],
+                              force: bool = False) -> Optional[RetrievalIndex]:
+        """Index the documentation and code for per-item retrieval.
+
+        Returns None when no batch would retrieve from them, unless force
+        is set (for critical items that don't fit in one prompt). Each batch
+        still checks its own categories with retrieves, so the document
+        batch of a repository with small docs but a lot of code keeps the
+        full docs.
+        """
+        if not force and not self.retrieves(content, CONTENT_CATEGORIES):
+            return None
+        with self.timed('retrieval_index'):
+            index = RetrievalIndex({category: content[category] for category in CONTENT_CATEGORIES})
+        print(f"Indexed {len(index.chunks)} chunks to retrieve from per rubric item")
+        return index
+
+    def build_excerpt_prompt(self, items: List[Dict], content: Dict[str, Dict[str, Any]],
+                             index: RetrievalIndex, categories: List[str], instructions: str) -> str:
+        """A prompt with the repository structure and the chunks most relevant to each item.
+
+        Each item gets its own share of the budget, searched for with its
+        title and criteria. The excerpts differ between batches, so there is
+        no shared prefix to cache.
+        """
+        prompt = """You are grading an academic paper and the GitHub repository that produces it.
+
+Repository structure:
+{repo_structure}
+
+The repository is too large to include in full. These excerpts are the parts of its {categories} most relevant to each item below:
+{excerpts}
+
+{instructions}"""
+
+        fields = {'repo_structure': self.format_repo_structure(content),
+                  'categories': ' and '.join(categories), 'instructions': instructions}
+        available = self.prompt_token_budget - estimate_tokens(prompt.format(excerpts='', **fields))
+        if available <= 0:
+            raise ValueError(f"Prompt without excerpts is over the "
+                             f"{self.prompt_token_budget} token budget")
+        budget = min(self.retrieval_item_tokens, available // max(1, len(items)))
+        excerpts = index.select([f"{item['title']}\n{item['criteria']}" for item in items],
+                                budget, categories)
+        return prompt.format(excerpts=self.format_files(excerpts), **fields)
+
     def grade_critical_batch(self, items: List[Dict], 
-                           content: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+                           content: Dict[str, Dict[str, Any]],
+                           hints: Optional[Dict[str, List[str]]] = None,
+                           index: Optional[RetrievalIndex] = None) -> Dict[str, Any]:
         """Grade critical pass/fail requirements"""
-        prompt = """You are evaluating critical pass/fail requirements for an academic paper.
+        prompt = self.build_critical_prompts(items, content, hints, index)[0]
+        return self.grade_prompt(prompt, 'critical', stop_on_fail=True)
+
+    def build_critical_prompts(self, items: List[Dict], 
+                               content: Dict[str, Dict[str, Any]],
+                               hints: Optional[Dict[str, List[str]]] = None,
+                               index: Optional[RetrievalIndex] = None) -> List[Tuple[str, str]]:
+        """Build the critical requirement prompt, with any pre-check hints.
+
+        Always a single prompt: the items are a pass/fail gate, and packs
+        graded independently can't be merged safely ("Class paper" fails on
+        a sign of a class project in any one pack, "Data cited" passes on a
+        citation in any one). When every doc and code file fits, the prompt
+        has them all; otherwise, or with more documentation and code than
+        retrieval_min_tokens, it carries the excerpts relevant to each
+        requirement, building a retrieval index if none was given.
+        """
+        instructions = """You are evaluating critical pass/fail requirements for the paper above.
 These requirements MUST be met for the paper to pass.
 
 Critical requirements to evaluate:
 {requirements}
-
-Repository content:
-
-Documentation files:
-{docs}
-
+{hints}
 Code files:
 {code}
 
-Data files present:
-{data_files}
-
 Evaluate each requirement carefully, looking for clear evidence in ANY file.
 Consider code comments, documentation, and all relevant text.
 
@@ -188,31 +748,42 @@ GRADE: [0 or 1]
 EXPLANATION: [detailed explanation with specific evidence]
 END_ITEM"""
         
-        formatted_requirements = "\n\n".join(self.format_rubric_item(item) for item in items)
-        
-        response = self.llm.invoke(prompt.format(
-            requirements=formatted_requirements,
-            docs="\n\n".join(f"File: {path}\nContent:\n{content}" 
-                            for path, content in content['documentation'].items()),
-            code="\n\n".join(f"File: {path}\nContent:\n{content}" 
-                            for path, content in content['code'].items()),
-            data_files=json.dumps(content['data_metadata'], indent=2)
-        ))
-        
-        return self.parse_batch_response(response.content)
+        requirements = "\n\n".join(self.format_rubric_item(item) for item in items)
+        hints = "".join(f"\n- {title}: {line}" for title, lines in (hints or {}).items()
+                        for line in lines)
+        if hints:
+            hints = f"\nAutomated pre-check findings (confirm them against the files):{hints}\n"
+        if not (index and self.retrieves(content, CONTENT_CATEGORIES)):
+            prefixes = self.build_repo_prefixes(content)
+            overhead = estimate_tokens(prefixes[0]) + estimate_tokens(
+                instructions.format(requirements=requirements, hints=hints, code=''))
+            code_groups = pack_files(content['code'], self.prompt_token_budget - overhead) or [{}]
+            if len(prefixes) == 1 and len(code_groups) == 1:
+                return [(prefixes[0], instructions.format(requirements=requirements, hints=hints,
+                                                          code=self.format_files(code_groups[0])))]
+            index = index or self.build_retrieval_index(content, force=True)
+        return [('', self.build_excerpt_prompt(
+            items, content, index, CONTENT_CATEGORIES,
+            instructions.format(requirements=requirements, hints=hints,
+                                code="(relevant code is among the excerpts above)")))]
 
     def grade_document_batch(self, items: List[Dict], 
-                           content: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+                           content: Dict[str, Dict[str, Any]],
+                           index: Optional[RetrievalIndex] = None) -> Dict[str, Any]:
         """Grade document structure and content items"""
-        prompt = """You are evaluating the structure and content of an academic paper.
+        prompts = self.build_document_prompts(items, content, index)
+        return self.merge_chunk_results(self.grade_prompts(prompts, 'document'))
+
+    def build_document_prompts(self, items: List[Dict], 
+                               content: Dict[str, Dict[str, Any]],
+                               index: Optional[RetrievalIndex] = None) -> List[Tuple[str, str]]:
+        """Build document prompts, one per repository-content prefix, or one of retrieved excerpts for large docs"""
+        instructions = """You are evaluating the structure and content of the paper above.
 Focus on writing quality, organization, and completeness of required sections.
 
 Items to evaluate:
 {items}
 
-Document files:
-{docs}
-
 For each item, provide your response in exactly this format:
 ITEM: [item title]
 GRADE: [numerical grade based on item's range]
@@ -220,31 +791,28 @@ EXPLANATION: [detailed explanation with specific evidence]
 END_ITEM"""
         
         formatted_items = "\n\n".join(self.format_rubric_item(item) for item in items)
-        
-        response = self.llm.invoke(prompt.format(
-            items=formatted_items,
-            docs="\n\n".join(f"File: {path}\nContent:\n{content}" 
-                            for path, content in content['documentation'].items())
-        ))
-        
-        return self.parse_batch_response(response.content)
+        if index and self.retrieves(content, ['documentation']):
+            return [('', self.build_excerpt_prompt(items, content, index, ['documentation'],
+                                                   instructions.format(items=formatted_items)))]
+        return [(prefix, instructions.format(items=formatted_items))
+                for prefix in self.build_repo_prefixes(content)]
 
     def grade_technical_batch(self, items: List[Dict], 
                          content: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
         """Grade technical implementation items with size management"""
+        prompts = self.build_technical_prompts(items, content)
+        return self.merge_chunk_results(self.grade_prompts(prompts, 'technical'))
+
+    def build_technical_prompts(self, items: List[Dict], 
+                                content: Dict[str, Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """Build one technical grading prompt per pack of code files"""
         # Only include .py and .R files
         main_code = {k: v for k, v in content['code'].items() 
                     if k.lower().endswith(('.r', '.py'))}
+        if not main_code:
+            return []
         
-        # Split into multiple batches if needed
-        results = {'grades': {}, 'explanations': {}}
-        code_items = list(main_code.items())
-        batch_size = 3  # Process 3 files at a time
-        
-        for i in range(0, len(code_items), batch_size):
-            batch_files = dict(code_items[i:i + batch_size])
-            
-            prompt = """You are evaluating the technical implementation of an academic paper.
+        prompt = """You are evaluating the technical implementation of an academic paper.
 Focus on code quality, testing, reproducibility, and technical completeness.
 
 Items to evaluate:
@@ -261,45 +829,38 @@ ITEM: [item title]
 GRADE: [numerical grade based on item's range]
 EXPLANATION: [detailed explanation with specific evidence]
 END_ITEM"""
-            
-            formatted_items = "\n\n".join(self.format_rubric_item(item) for item in items)
-            total_batches = (len(code_items) + batch_size - 1) // batch_size
-            current_batch = i // batch_size + 1
-            
-            response = self.llm.invoke(prompt.format(
-                items=formatted_items,
-                batch_num=current_batch,
-                total_batches=total_batches,
-                code="\n\n".join(f"File: {path}\nContent:\n{content}" 
-                                for path, content in batch_files.items()),
-                data_metadata=json.dumps(content['data_metadata'], indent=2)
-            ))
-            
-            batch_results = self.parse_batch_response(response.content)
-            
-            # For first batch, use the grades as is
-            if i == 0:
-                results = batch_results
-            # For subsequent batches, update grades if they're higher
-            else:
-                for title in batch_results['grades']:
-                    if title not in results['grades'] or batch_results['grades'][title] > results['grades'][title]:
-                        results['grades'][title] = batch_results['grades'][title]
-                        results['explanations'][title] = batch_results['explanations'][title]
         
-        return results
+        fields = {
+            'items': "\n\n".join(self.format_rubric_item(item) for item in items),
+            'data_metadata': json.dumps(content['data_metadata'], indent=2)
+        }
+        overhead = estimate_tokens(prompt.format(batch_num='', total_batches='', code='', **fields))
+        groups = pack_files(main_code, self.prompt_token_budget - overhead)
+        # Each call sees different code, so there is no shared prefix to cache
+        return [('', prompt.format(batch_num=i, total_batches=len(groups),
+                                   code=self.format_files(group), **fields))
+                for i, group in enumerate(groups, 1)]
 
     def grade_remaining_batch(self, items: List[Dict], 
-                            content: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+                            content: Dict[str, Dict[str, Any]],
+                            index: Optional[RetrievalIndex] = None) -> Dict[str, Any]:
         """Grade remaining rubric items"""
-        prompt = """Grade these remaining rubric items considering all repository content.
+        prompts = self.build_remaining_prompts(items, content, index)
+        return self.merge_chunk_results(self.grade_prompts(prompts, 'remaining'))
+
+    def build_remaining_prompts(self, items: List[Dict], 
+                                content: Dict[str, Dict[str, Any]],
+                                index: Optional[RetrievalIndex] = None) -> List[Tuple[str, str]]:
+        """Build remaining-item prompts, one per repository-content prefix, or one of retrieved excerpts for large docs.
+
+        The document batch retrieves whenever this one does, so the
+        full-docs prefix is either shared by both or sent by neither.
+        """
+        instructions = """Grade these remaining rubric items considering all repository content above.
 
 Items to evaluate:
 {items}
 
-Repository structure:
-{repo_structure}
-
 For each item, provide your response in exactly this format:
 ITEM: [item title]
 GRADE: [numerical grade based on item's range]
@@ -307,21 +868,112 @@ EXPLANATION: [detailed explanation with specific evidence]
 END_ITEM"""
         
         formatted_items = "\n\n".join(self.format_rubric_item(item) for item in items)
+        if index and self.retrieves(content, ['documentation']):
+            return [('', self.build_excerpt_prompt(items, content, index, ['documentation'],
+                                                   instructions.format(items=formatted_items)))]
+        return [(prefix, instructions.format(items=formatted_items))
+                for prefix in self.build_repo_prefixes(content)]
+
+    def build_messages(self, prompt: Tuple[str, str]) -> List[HumanMessage]:
+        """Turn a (prefix, instructions) prompt into chat messages.
+
+        The prefix is marked as a prompt-cache breakpoint, so calls that
+        share it only pay full price for it once.
+        """
+        prefix, instructions = prompt
+        if not prefix:
+            return [HumanMessage(content=instructions)]
+        return [HumanMessage(content=[
+            {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": instructions}
+        ])]
+
+    def grade_prompts(self, prompts: List[Tuple[str, str]], batch: str,
+                      stop_on_fail: bool = False) -> List[Dict[str, Any]]:
+        """Grade several prompts of one batch concurrently, results in prompt order"""
+        with ThreadPoolExecutor(max_workers=self.llm_concurrency) as executor:
+            return list(executor.map(lambda prompt: self.grade_prompt(prompt, batch, stop_on_fail),
+                                     prompts))
+
+    def grade_prompt(self, prompt: Tuple[str, str], batch: str,
+                     stop_on_fail: bool = False) -> Dict[str, Any]:
+        """Send a single grading prompt, record its token usage and parse the response.
+
+        The response is streamed, and each item is reported as an
+        item_graded event as soon as its block is complete. With
+        stop_on_fail the call is cancelled at the first item graded 0,
+        keeping only the items completed by then.
+        """
+        estimated_tokens = estimate_tokens(prompt[0] + prompt[1])
+        if estimated_tokens > self.prompt_token_budget:
+            raise ValueError(f"{batch} prompt is ~{estimated_tokens} tokens, "
+                             f"over the {self.prompt_token_budget} token budget")
         
-        # Create a repository structure summary
-        repo_structure = {
-            'documentation_files': list(content['documentation'].keys()),
-            'code_files': list(content['code'].keys()),
-            'data_files': content['data_metadata'],
-            'other_files': list(content['other'].keys())
-        }
+        if self.llm_limiter:
+            self.llm_limiter.acquire()
+        parser = ItemStreamParser(self.parse_batch_response)
+        response = None
+        cancelled = False
+        with self.timed('llm_call', batch):
+            stream = self.llm.stream(self.build_messages(prompt))
+            try:
+                for chunk in stream:
+                    # Adding chunks sums their usage metadata
+                    response = chunk if response is None else response + chunk
+                    completed = parser.feed(chunk_text(chunk))
+                    if completed['grades']:
+                        self.emit('item_graded', batch=batch, **completed)
+                        if stop_on_fail and 0 in completed['grades'].values():
+                            cancelled = True
+                            break
+            finally:
+                # Closing the stream early abandons the response, so nothing
+                # after the failing item is waited for
+                stream.close()
         
-        response = self.llm.invoke(prompt.format(
-            items=formatted_items,
-            repo_structure=json.dumps(repo_structure, indent=2)
-        ))
+        usage = getattr(response, 'usage_metadata', None) or {}
+        cache_usage = usage.get('input_token_details') or {}
+        call = {
+            'batch': batch,
+            'estimated_input_tokens': estimated_tokens,
+            'input_tokens': usage.get('input_tokens'),
+            # A cancelled stream never gets its final usage, so estimate it
+            'output_tokens': estimate_tokens(parser.text) if cancelled else usage.get('output_tokens'),
+            'cache_read_input_tokens': cache_usage.get('cache_read'),
+            'cache_creation_input_tokens': cache_usage.get('cache_creation'),
+            'cancelled': cancelled
+        }
+        with self._llm_calls_lock:
+            self.llm_calls.append(call)
+        self.count('llm_calls', batch=batch)
+        self.count('input_tokens', call['input_tokens'] or 0, batch=batch)
+        self.count('output_tokens', call['output_tokens'] or 0, batch=batch)
+        self.count('cache_read_tokens', call['cache_read_input_tokens'] or 0, batch=batch)
+        print(f"{batch} call: ~{estimated_tokens} estimated input tokens, "
+              f"{call['input_tokens']} input ({call['cache_read_input_tokens']} from cache) / "
+              f"{call['output_tokens']} output tokens billed"
+              + (" (cancelled after a failing item)" if cancelled else ""))
         
-        return self.parse_batch_response(response.content)
+        with self.timed('parse', batch):
+            parsed = parser.results if cancelled else self.parse_batch_response(parser.text)
+        self.emit('batch_result', batch=batch, **parsed)
+        return parsed
+
+    def merge_chunk_results(self, chunk_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine per-chunk results in order, keeping each item's highest grade.
+
+        Used for the document, technical and remaining batches, whose items
+        are graded on the best evidence any pack shows (a pack without the
+        tests can't judge them). Critical items are never split over calls;
+        see build_critical_prompts.
+        """
+        results = {'grades': {}, 'explanations': {}}
+        for batch_results in chunk_results:
+            for title in batch_results['grades']:
+                if title not in results['grades'] or batch_results['grades'][title] > results['grades'][title]:
+                    results['grades'][title] = batch_results['grades'][title]
+                    results['explanations'][title] = batch_results['explanations'][title]
+        return results
 
     def parse_batch_response(self, response: str) -> Dict[str, Any]:
         """Parse the LLM's grading response with improved multi-line handling"""
@@ -380,7 +1032,8 @@ END_ITEM"""
                 
         return (total / max_possible) * 100 if max_possible > 0 else 0
 
-    def generate_markdown_report(self, owner: str, repo: str, results: Dict[str, Any]) -> str:
+    def generate_markdown_report(self, owner: str, repo: str, results: Dict[str, Any],
+                                 include_timings: bool = False) -> str:
         """Generate a detailed markdown report of the grading results"""
         report = f"""# Grading Report for {owner}/{repo}
             Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
@@ -422,6 +1075,18 @@ END_ITEM"""
             report += f"#### {item['title']} ({item['grade']}/{item['max']} points)\n"
             report += f"*{item['explanation']}*\n\n"
 
+        if include_timings and results.get('timings'):
+            report += "### Timings\n\n"
+            report += "| Stage | Seconds |\n|---|---|\n"
+            for stage, seconds in results['timings'].items():
+                report += f"| {stage} | {seconds:.2f} |\n"
+            report += "\n"
+            if results.get('counters'):
+                report += "| Counter | Value |\n|---|---|\n"
+                for name, value in results['counters'].items():
+                    report += f"| {name} | {value} |\n"
+                report += "\n"
+
         return report
 
 def main():
@@ -432,29 +1097,70 @@ def main():
     if not github_token or not anthropic_api_key:
         raise ValueError("Please set GITHUB_TOKEN and ANTHROPIC_API_KEY environment variables")
 
-    # Initialize grader
-    grader = RepoGrader(
-        github_token=github_token,
-        anthropic_api_key=anthropic_api_key,
-        rubric_path="src/data/rubric.json"
-    )
-
     # Get repository details from command line
     import argparse
     parser = argparse.ArgumentParser(description="Grade a GitHub repository")
-    parser.add_argument("url", help="GitHub repository URL")
+    parser.add_argument("url", nargs="?", help="GitHub repository URL")
+    parser.add_argument("--force", action="store_true",
+                        help="Regrade even if results for this commit are cached")
+    parser.add_argument("--invalidate", action="store_true",
+                        help="Drop cached results for this repository and exit")
+    parser.add_argument("--roster",
+                        help="CSV or text file of repository URLs to grade as a batch")
+    parser.add_argument("--output-dir", default="grading_reports",
+                        help="Where --roster writes reports, its checkpoint and summary.csv")
+    parser.add_argument("--workers", type=int, default=ROSTER_WORKERS,
+                        help="Repositories graded at once with --roster")
+    parser.add_argument("--timings", action="store_true",
+                        help="Add per-stage timings and counters to the report")
     args = parser.parse_args()
+    if bool(args.url) == bool(args.roster):
+        parser.error("give either a repository URL or --roster")
+
+    result_cache = SQLiteResultCache(RESULT_CACHE_PATH)
+    blob_cache = BlobCache(BLOB_CACHE_DIR, BLOB_CACHE_MAX_BYTES)
+    # Shared by every grader so the whole run stays under the API rate limits
+    github_limiter = RateLimiter(GITHUB_REQUESTS_PER_SECOND, burst=FETCH_CONCURRENCY)
+    llm_limiter = RateLimiter(LLM_REQUESTS_PER_MINUTE, per=60)
+    github_client = GitHubClient(github_token, api_url=GITHUB_API_URL, raw_url=GITHUB_RAW_URL,
+                                 pool_size=FETCH_CONCURRENCY * args.workers,
+                                 limiter=github_limiter)
+
+    def make_grader():
+        return RepoGrader(
+            github_token=github_token,
+            anthropic_api_key=anthropic_api_key,
+            rubric_path="src/data/rubric.json",
+            blob_cache=blob_cache,
+            result_cache=result_cache,
+            llm_limiter=llm_limiter,
+            github_client=github_client
+        )
+
+    if args.roster:
+        from src.roster import RosterGrader, read_roster
+        RosterGrader(make_grader, args.output_dir, workers=args.workers,
+                     force_regrade=args.force).run(read_roster(args.roster))
+        return
 
     # Parse GitHub URL
     parts = args.url.strip("/").split("/")
     owner = parts[-2]
     repo = parts[-1]
 
+    if args.invalidate:
+        removed = result_cache.invalidate(f"{owner}/{repo}")
+        print(f"Removed {removed} cached result(s) for {owner}/{repo}")
+        return
+
+    # Initialize grader
+    grader = make_grader()
+
     # Grade repository
-    results = grader.analyze_repo(owner, repo)
+    results = grader.analyze_repo(owner, repo, force_regrade=args.force)
     
     # Generate report
-    report = grader.generate_markdown_report(owner, repo, results)
+    report = grader.generate_markdown_report(owner, repo, results, include_timings=args.timings)
     
     # Save report
     report_filename = f"grading_report_{owner}_{repo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
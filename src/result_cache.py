@@ -0,0 +1,132 @@
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+
+
+class ResultCache(ABC):
+    """Storage interface for finished grading results.
+
+    Entries are keyed by everything that can change a grade: the repository
+    tree SHA, a hash of the rubric, the model and the prompt template
+    version. Subclass this and implement every method to plug in a different
+    backend.
+    """
+
+    @abstractmethod
+    def get(self, tree_sha: str, rubric_hash: str, model: str,
+            prompt_version: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def set(self, repo: str, tree_sha: str, rubric_hash: str, model: str,
+            prompt_version: str, results: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def get_snapshot(self, repo: str, rubric_hash: str, model: str,
+                     prompt_version: str) -> Optional[Dict[str, Any]]:
+        """Latest graded tree of a repository: {'tree_sha', 'files' (path -> blob SHA), 'batches'}"""
+
+    @abstractmethod
+    def set_snapshot(self, repo: str, rubric_hash: str, model: str, prompt_version: str,
+                     tree_sha: str, files: Dict[str, str], batches: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def invalidate(self, repo: Optional[str] = None) -> int:
+        """Drop cached results and snapshots for one "owner/repo", or all of them; returns the count of results removed"""
+
+
+class SQLiteResultCache(ResultCache):
+    """Local SQLite-backed result cache, safe to share between processes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS results (
+                tree_sha TEXT NOT NULL,
+                rubric_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                results TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (tree_sha, rubric_hash, model, prompt_version)
+            )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_repo ON results (repo)")
+            # Only the latest graded tree per repository, for incremental regrading
+            conn.execute("""CREATE TABLE IF NOT EXISTS snapshots (
+                repo TEXT NOT NULL,
+                rubric_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                tree_sha TEXT NOT NULL,
+                files TEXT NOT NULL,
+                batches TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (repo, rubric_hash, model, prompt_version)
+            )""")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per operation keeps this usable from any thread
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, tree_sha, rubric_hash, model, prompt_version):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT results FROM results WHERE tree_sha = ? AND rubric_hash = ? "
+                "AND model = ? AND prompt_version = ?",
+                (tree_sha, rubric_hash, model, prompt_version)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, repo, tree_sha, rubric_hash, model, prompt_version, results):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (tree_sha, rubric_hash, model, prompt_version, repo,
+                 json.dumps(results), time.time())
+            )
+
+    def get_snapshot(self, repo, rubric_hash, model, prompt_version):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT tree_sha, files, batches FROM snapshots WHERE repo = ? "
+                "AND rubric_hash = ? AND model = ? AND prompt_version = ?",
+                (repo, rubric_hash, model, prompt_version)
+            ).fetchone()
+        if not row:
+            return None
+        return {'tree_sha': row[0], 'files': json.loads(row[1]), 'batches': json.loads(row[2])}
+
+    def set_snapshot(self, repo, rubric_hash, model, prompt_version, tree_sha, files, batches):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (repo, rubric_hash, model, prompt_version, tree_sha,
+                 json.dumps(files), json.dumps(batches), time.time())
+            )
+
+    def invalidate(self, repo=None):
+        with self._connect() as conn:
+            if repo is None:
+                cursor = conn.execute("DELETE FROM results")
+                conn.execute("DELETE FROM snapshots")
+            else:
+                cursor = conn.execute("DELETE FROM results WHERE repo = ?", (repo,))
+                conn.execute("DELETE FROM snapshots WHERE repo = ?", (repo,))
+            return cursor.rowcount
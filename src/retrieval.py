@@ -0,0 +1,126 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from src.packing import CHARS_PER_TOKEN, estimate_tokens, split_sections
+
+# Largest chunk, in tokens; longer sections are cut on lines
+CHUNK_TOKENS = 800
+
+# Words too common in rubric criteria and papers to say anything about relevance
+STOPWORDS = set("""a an and are as at be been but by can could do does for from has have if in
+into is it its may must no not of on or should so such than that the their then there these
+this those to was were what when where which while who will with would you your""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words and identifier parts (snake_case splits into its words)"""
+    return [word for word in re.findall(r'[a-z0-9]+', text.lower())
+            if len(word) > 1 and word not in STOPWORDS]
+
+
+def chunk_file(path: str, content: str, max_tokens: int = CHUNK_TOKENS) -> List[Dict[str, Any]]:
+    """Split a file into section- or function-level chunks with their line ranges.
+
+    Chunks follow split_sections, so a document breaks at its headings and
+    a script at its function definitions; a section over max_tokens is cut
+    on lines, and a single overlong line mid-line.
+    """
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    chunks = []
+    line = 1
+    for section in split_sections(path, content):
+        pieces = []
+        current = ''
+        for text in section.splitlines(keepends=True):
+            while len(text) > max_chars:
+                if current:
+                    pieces.append(current)
+                    current = ''
+                pieces.append(text[:max_chars])
+                text = text[max_chars:]
+            if current and len(current) + len(text) > max_chars:
+                pieces.append(current)
+                current = ''
+            current += text
+        if current:
+            pieces.append(current)
+        for piece in pieces:
+            # A line cut mid-way is counted once, by the piece it ends in
+            end = line + max(0, piece.count('\n') - (1 if piece.endswith('\n') else 0))
+            chunks.append({'path': path, 'start': line, 'end': end, 'text': piece})
+            line = end + 1 if piece.endswith('\n') else end
+    return chunks
+
+
+class RetrievalIndex:
+    """BM25 index over section- and function-level chunks of a repository's files.
+
+    files maps categories (as in preprocess_repo_content) to {path: content};
+    chunks keep the order of the files and of the lines within them.
+    """
+
+    def __init__(self, files: Dict[str, Dict[str, str]], k1: float = 1.5, b: float = 0.75,
+                 max_chunk_tokens: int = CHUNK_TOKENS):
+        self.k1 = k1
+        self.b = b
+        self.chunks = []
+        for category, category_files in files.items():
+            for path, content in category_files.items():
+                for chunk in chunk_file(path, content, max_chunk_tokens):
+                    chunk['category'] = category
+                    chunk['tokens'] = estimate_tokens(chunk['text'])
+                    self.chunks.append(chunk)
+
+        # Posting lists: term -> [(chunk index, occurrences)]
+        self.postings = {}
+        self.lengths = []
+        for i, chunk in enumerate(self.chunks):
+            counts = Counter(tokenize(chunk['path'] + '\n' + chunk['text']))
+            self.lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                self.postings.setdefault(term, []).append((i, count))
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+        total = len(self.chunks)
+        self.idf = {term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for term, postings in self.postings.items()}
+
+    def search(self, query: str, categories: Optional[List[str]] = None) -> List[int]:
+        """Indexes of the chunks matching the query, best first"""
+        scores = Counter()
+        for term in set(tokenize(query)):
+            for i, count in self.postings.get(term, []):
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.average_length)
+                scores[i] += self.idf[term] * count * (self.k1 + 1) / (count + norm)
+        return [i for i, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+                if not categories or self.chunks[i]['category'] in categories]
+
+    def select(self, queries: List[str], budget: int,
+               categories: Optional[List[str]] = None) -> Dict[str, str]:
+        """The best chunks for each query, up to budget tokens per query.
+
+        Returns {label: text} in repository order, with adjacent chunks of
+        a file merged and labelled by line range, e.g. "paper.qmd (lines 1-40)".
+        """
+        selected = set()
+        for query in queries:
+            spent = 0
+            for i in self.search(query, categories):
+                # Chunks another query already picked come for free
+                if i in selected or spent + self.chunks[i]['tokens'] > budget:
+                    continue
+                selected.add(i)
+                spent += self.chunks[i]['tokens']
+
+        excerpts = []
+        for i in sorted(selected):
+            chunk = self.chunks[i]
+            previous = excerpts[-1] if excerpts else None
+            if previous and previous['path'] == chunk['path'] and previous['last'] == i - 1:
+                previous.update(end=chunk['end'], last=i, text=previous['text'] + chunk['text'])
+            else:
+                excerpts.append({'path': chunk['path'], 'start': chunk['start'], 'end': chunk['end'],
+                                 'last': i, 'text': chunk['text']})
+        return {f"{excerpt['path']} (lines {excerpt['start']}-{excerpt['end']})": excerpt['text']
+                for excerpt in excerpts}
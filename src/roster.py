@@ -0,0 +1,130 @@
+import csv
+import json
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.repo_grader import RepoGrader
+
+CHECKPOINT_FILENAME = "checkpoint.jsonl"
+SUMMARY_FILENAME = "summary.csv"
+
+
+def parse_repo_url(url: str) -> Tuple[str, str]:
+    """Split a GitHub URL into owner and repo"""
+    parts = url.strip().strip("/").split("/")
+    repo = parts[-1]
+    if repo.endswith(".git"):
+        repo = repo[:-len(".git")]
+    return parts[-2], repo
+
+
+def read_roster(path: str) -> List[str]:
+    """Read repository URLs from a CSV or plain-text roster, in order and without duplicates.
+
+    In a CSV the first cell of each row that looks like a GitHub URL is
+    used, so extra columns (names, student numbers) are fine. A text file
+    has one URL per line; blank lines and lines starting with # are skipped.
+    """
+    urls = []
+    with open(path, newline='') as f:
+        if path.lower().endswith('.csv'):
+            for row in csv.reader(f):
+                urls.extend([cell.strip() for cell in row if 'github.com' in cell][:1])
+        else:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    urls.append(line)
+    return list(dict.fromkeys(urls))
+
+
+class RosterGrader:
+    """Grades a whole class of repositories concurrently, resumably.
+
+    Every finished repository is appended to a JSONL checkpoint in the
+    output directory as soon as it is done, so an interrupted run picks up
+    where it stopped; repositories that failed are retried. Each repository
+    gets its markdown report, and summary.csv collects every score.
+    """
+
+    def __init__(self, make_grader: Callable[[], RepoGrader], output_dir: str,
+                 workers: int = 4, force_regrade: bool = False):
+        self.make_grader = make_grader
+        self.output_dir = output_dir
+        self.workers = max(1, workers)
+        self.force_regrade = force_regrade
+        self.checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILENAME)
+        self._checkpoint_lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        """Latest checkpoint record per URL"""
+        records = {}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Partial line from an interrupted write
+                    records[record['url']] = record
+        return records
+
+    def write_checkpoint(self, record: Dict[str, Any]) -> None:
+        with self._checkpoint_lock:
+            with open(self.checkpoint_path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def grade_one(self, url: str) -> Dict[str, Any]:
+        owner, repo = parse_repo_url(url)
+        record = {'url': url, 'owner': owner, 'repo': repo}
+        try:
+            grader = self.make_grader()
+            results = grader.analyze_repo(owner, repo, force_regrade=self.force_regrade)
+            report_path = os.path.join(self.output_dir, f"grading_report_{owner}_{repo}.md")
+            with open(report_path, 'w') as f:
+                f.write(grader.generate_markdown_report(owner, repo, results))
+            record.update(status='graded', total_score=results.get('total_score', 0),
+                          grades=results['grades'], report=report_path)
+        except Exception as e:
+            traceback.print_exc()
+            record.update(status='failed', error=str(e))
+        self.write_checkpoint(record)
+        print(f"[{record['status']}] {owner}/{repo}")
+        return record
+
+    def run(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """Grade every URL not already graded, then write the summary CSV"""
+        done = {url for url, record in self.load_checkpoint().items()
+                if record['status'] == 'graded'}
+        pending = [url for url in urls if url not in done]
+        print(f"{len(done & set(urls))} of {len(urls)} repositories already graded, "
+              f"grading {len(pending)} with {self.workers} workers...")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self.grade_one, pending))
+
+        records = self.load_checkpoint()
+        summary = [records[url] for url in urls if url in records]
+        self.write_summary(summary)
+        return summary
+
+    def write_summary(self, records: List[Dict[str, Any]]) -> None:
+        titles = list(dict.fromkeys(title for record in records
+                                    for title in record.get('grades', {})))
+        path = os.path.join(self.output_dir, SUMMARY_FILENAME)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['url', 'owner', 'repo', 'status', 'total_score', *titles, 'error'])
+            for record in records:
+                grades = record.get('grades', {})
+                writer.writerow([record['url'], record['owner'], record['repo'], record['status'],
+                                 record.get('total_score', ''),
+                                 *[grades.get(title, '') for title in titles],
+                                 record.get('error', '')])
+        print(f"Summary written to {path}")
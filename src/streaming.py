@@ -0,0 +1,42 @@
+from typing import Any, Callable, Dict
+
+END_MARKER = 'END_ITEM'
+
+
+def chunk_text(chunk: Any) -> str:
+    """Text of a streamed message chunk, whose content may be a string or content blocks"""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return ''.join(block.get('text', '') for block in content if isinstance(block, dict))
+
+
+class ItemStreamParser:
+    """Picks ITEM ... END_ITEM blocks out of a grading response as it streams in.
+
+    Each block is parsed with parse (RepoGrader.parse_batch_response) as
+    soon as its END_ITEM arrives. text holds everything fed so far, and
+    results every item parsed so far.
+    """
+
+    def __init__(self, parse: Callable[[str], Dict[str, Any]]):
+        self.parse = parse
+        self.text = ''
+        self.results = {'grades': {}, 'explanations': {}}
+        self._pending = ''
+
+    def feed(self, text: str) -> Dict[str, Any]:
+        """Add the next piece of the response; returns the items it completed"""
+        self.text += text
+        self._pending += text
+        completed = {'grades': {}, 'explanations': {}}
+        while True:
+            end = self._pending.find(END_MARKER)
+            if end == -1:
+                return completed
+            end += len(END_MARKER)
+            block, self._pending = self._pending[:end], self._pending[end:]
+            parsed = self.parse(block)
+            for key in ('grades', 'explanations'):
+                completed[key].update(parsed[key])
+                self.results[key].update(parsed[key])
@@ -0,0 +1,33 @@
+"""Regenerate the parquet fixtures for tests/test_data_sniffer.py (needs pyarrow):
+
+    python tests/fixtures/make_parquet.py
+"""
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    # 20 columns, so the schema list needs the long list header, with a
+    # boolean column and statistics (whose exactness flags are booleans)
+    wide = {f"col_{i:02d}": list(range(i, i + 5)) for i in range(17)}
+    wide['flag'] = [True, False, True, None, False]
+    wide['label'] = ['a', 'b', 'c', 'd', 'e']
+    wide['share'] = [0.1, 0.2, 0.3, 0.4, 0.5]
+    pq.write_table(pa.table(wide), os.path.join(HERE, 'wide.parquet'), write_statistics=True)
+
+    nested = pa.table({
+        'id': pa.array([1, 2, 3], pa.int32()),
+        'respondent': pa.array([{'age': 30, 'region': 'north'}, {'age': 41, 'region': 'south'},
+                                {'age': None, 'region': 'east'}],
+                               pa.struct([('age', pa.int64()), ('region', pa.string())])),
+        'answers': pa.array([[1, 2], [], [3]], pa.list_(pa.int64())),
+    })
+    pq.write_table(nested, os.path.join(HERE, 'nested.parquet'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+
+def reply(status: int = 200, body: bytes = b'', headers: Optional[Dict[str, str]] = None,
+          delay: float = 0.0, body_delay: float = 0.0) -> Dict:
+    """A scripted response: wait delay before the headers and body_delay before the body"""
+    return {'status': status, 'body': body, 'headers': headers or {},
+            'delay': delay, 'body_delay': body_delay}
+
+
+class StubServer:
+    """Local HTTP server that answers GETs with scripted responses, in order.
+
+    The last response repeats once the script runs out. Each request's path
+    and headers are kept in requests.
+    """
+
+    def __init__(self, responses: List[Dict]):
+        self.responses = list(responses)
+        self.requests = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self) -> 'StubServer':
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _next(self, path: str, headers: Dict[str, str]) -> Dict:
+        with self._lock:
+            self.requests.append({'path': path, 'headers': headers})
+            return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                response = stub._next(self.path, dict(self.headers))
+                time.sleep(response['delay'])
+                try:
+                    self.send_response(response['status'])
+                    for key, value in {'Content-Length': str(len(response['body'])),
+                                       **response['headers']}.items():
+                        self.send_header(key, value)
+                    self.end_headers()
+                    self.wfile.flush()
+                    time.sleep(response['body_delay'])
+                    self.wfile.write(response['body'])
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client gave up waiting
+
+        return Handler
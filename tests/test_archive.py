@@ -0,0 +1,105 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from benchmarks.fake_github import FakeGitHub
+from benchmarks.fake_llm import FakeChatAnthropic
+from src.github_client import GitHubClient
+from src.metrics import Metrics
+from src.repo_grader import RepoGrader
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUBRIC_PATH = os.path.join(ROOT, 'src', 'data', 'rubric.json')
+PREFIX = 'owner-repo-0123abc'
+
+with open(os.path.join(ROOT, 'tests', 'fixtures', 'nested.parquet'), 'rb') as f:
+    PARQUET = f.read()
+
+FILES = {
+    'README.md': b'# Forecast\n\nNo LLMs were used.\n',
+    'paper/paper.qmd': b'---\ntitle: Forecast\n---\n\n# Introduction\n\nText.\n',
+    'paper/references.bib': b'@Manual{r, author = {{R Core Team}}}\n',
+    'scripts/01-clean.R': b'library(dplyr)\n# Clean the data\n',
+    'scripts/notes.py': b'\xff\xfe not utf-8 \x00',
+    'scripts/huge.R': b'x <- 1\n' * 2000,
+    'data/raw.csv': b'state,share\nOhio,0.51\nIowa,0.48\n',
+    'data/analysis.parquet': PARQUET,
+    'other/figure.png': b'\x89PNG\r\n\x1a\n' + bytes(64),
+    'us-election.Rproj': b'Version: 1.0\n',
+}
+
+
+def tarball(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        directory = tarfile.TarInfo(PREFIX)
+        directory.type = tarfile.DIRTYPE
+        archive.addfile(directory)
+        for path, content in files.items():
+            info = tarfile.TarInfo(f"{PREFIX}/{path}")
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    buffer.seek(0)
+    return buffer
+
+
+def zipball(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr(f"{PREFIX}/", b'')
+        for path, content in files.items():
+            archive.writestr(f"{PREFIX}/{path}", content)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture(scope='module')
+def fake_github():
+    fake = FakeGitHub({'owner/repo': FILES}).start()
+    yield fake
+    fake.stop()
+
+
+def make_grader(fake):
+    client = GitHubClient(None, api_url=fake.url, raw_url=f"{fake.url}/raw")
+    # A small blob cap so scripts/huge.R is skipped like an oversized file
+    return RepoGrader(None, None, RUBRIC_PATH, github_client=client, llm=FakeChatAnthropic(),
+                      metrics=Metrics(), max_blob_size=10_000)
+
+
+@pytest.fixture(scope='module')
+def from_api(fake_github):
+    """What the API source produces: the tree, the fetched blobs and ranged data reads"""
+    grader = make_grader(fake_github)
+    tree = grader.get_repo_tree('owner', 'repo')['tree']
+    blobs, repo_files, file_sizes = grader.plan_repo_fetch(tree)
+    repo_files.update(grader.fetch_files(blobs))
+    data_details = grader.inspect_data_files('owner', 'repo', file_sizes)
+    return repo_files, file_sizes, data_details
+
+
+@pytest.mark.parametrize('archive_format, build', [('tarball', tarball), ('zipball', zipball)])
+def test_archive_matches_api(fake_github, from_api, archive_format, build):
+    extracted = make_grader(fake_github).extract_archive(build(FILES), archive_format)
+    assert extracted == from_api
+
+
+def test_archive_contents(fake_github):
+    repo_files, file_sizes, data_details = make_grader(fake_github).extract_archive(tarball(FILES))
+    assert set(repo_files) == set(FILES)
+    assert repo_files['paper/paper.qmd'] == FILES['paper/paper.qmd'].decode()
+    assert repo_files['paper/references.bib'] is not None  # Read by the pre-checks
+    assert repo_files['scripts/notes.py'] == "[Binary file content]"
+    assert repo_files['scripts/huge.R'] is None  # Over the blob cap
+    assert repo_files['data/raw.csv'] is None
+    assert file_sizes['scripts/huge.R'] == len(FILES['scripts/huge.R'])
+    assert data_details['data/raw.csv']['columns'] == ['state', 'share']
+    assert data_details['data/analysis.parquet']['column_count'] == 4
+
+
+def test_unknown_archive_format(fake_github):
+    with pytest.raises(ValueError):
+        make_grader(fake_github).extract_archive(io.BytesIO(b''), 'rar')
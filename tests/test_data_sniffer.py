@@ -0,0 +1,142 @@
+import os
+import struct
+import time
+
+from src.data_sniffer import CompactReader, inspect_data_file, parse_parquet_footer
+from src.github_client import GitHubClient
+from tests.stub_server import StubServer, reply
+
+# Written by pyarrow; tests/fixtures/make_parquet.py regenerates them
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def footer_metadata(data: bytes):
+    """The decoded FileMetaData struct, and whether decoding used up exactly the footer"""
+    length = struct.unpack('<I', data[-8:-4])[0]
+    reader = CompactReader(data[-8 - length:-8])
+    metadata = reader.read_struct()
+    return metadata, reader.pos == length
+
+
+def booleans(value, path=()):
+    """Paths of every boolean anywhere in a decoded struct"""
+    if isinstance(value, bool):
+        return [path]
+    if isinstance(value, dict):
+        return [found for key, item in value.items() for found in booleans(item, path + (key,))]
+    if isinstance(value, list):
+        return [found for item in value for found in booleans(item, path + ('[]',))]
+    return []
+
+
+class TestParquetFooter:
+    def test_wide_schema(self):
+        data = fixture('wide.parquet')
+        result = parse_parquet_footer(data, len(data))
+        assert result['column_count'] == 20
+        assert result['columns'][:2] == ['col_00 (int64)', 'col_01 (int64)']
+        assert result['columns'][-3:] == ['flag (boolean)', 'label (string)', 'share (double)']
+        assert result['estimated_rows'] == 5
+        assert result['rows_exact']
+
+    def test_long_list_header_stays_aligned(self):
+        # Root plus 20 columns is over the 14 elements a short list header holds
+        metadata, aligned = footer_metadata(fixture('wide.parquet'))
+        assert len(metadata[2]) == 21
+        assert aligned
+
+    def test_nested_schema_names_leaves_by_path(self):
+        data = fixture('nested.parquet')
+        result = parse_parquet_footer(data, len(data))
+        assert result['columns'] == ['id (int32)', 'respondent.age (int64)',
+                                     'respondent.region (string)', 'answers.list.element (int64)']
+        assert result['estimated_rows'] == 3
+        assert footer_metadata(data)[1]
+
+    def test_boolean_fields(self):
+        # pyarrow marks statistics min/max as exact with boolean fields
+        metadata, aligned = footer_metadata(fixture('wide.parquet'))
+        assert aligned
+        assert booleans(metadata)
+
+    def test_inspect_reads_only_the_tail(self):
+        data = fixture('nested.parquet')
+        reads = []
+
+        def read_tail(n):
+            reads.append(n)
+            return data[-n:]
+
+        result = inspect_data_file('data/analysis.parquet', len(data), lambda n: b'', read_tail)
+        assert result['column_count'] == 4
+        assert reads == [len(data)]
+
+    def test_footer_over_the_read_limit(self):
+        data = fixture('wide.parquet')
+        assert 'over the read limit' in parse_parquet_footer(data[-100:], len(data))['sniff_error']
+
+    def test_not_parquet(self):
+        assert parse_parquet_footer(b'a,b\n1,2\n' * 4, 32) == {'sniff_error': 'not a parquet file'}
+
+
+class TestCompactReader:
+    def test_boolean_struct_fields(self):
+        # Field 1 true, field 2 false (the value is in the field type), stop
+        assert CompactReader(bytes([0x11, 0x12, 0x00])).read_struct() == {1: True, 2: False}
+
+    def test_boolean_list_elements(self):
+        # Three booleans, a byte each; writers use 0 or 2 for false
+        assert CompactReader(bytes([0x31, 1, 0, 2])).read_list() == [True, False, False]
+
+    def test_long_list_header(self):
+        # Size 15 in the header means the real size follows as a varint
+        values = list(range(-10, 10))
+        data = bytes([0xf5, len(values)]) + bytes((v << 1) ^ (v >> 63) for v in values)
+        assert CompactReader(data).read_list() == values
+
+    def test_long_field_id(self):
+        # Delta 0: the field id follows as a zigzag i16 (here 20)
+        assert CompactReader(bytes([0x05, 40, 0x02, 0x00])).read_struct() == {20: 1}
+
+    def test_map(self):
+        # {b"k": 3}: size, key/value types (binary, i32), then the entries
+        data = bytes([1, 0x85, 1]) + b'k' + bytes([6])
+        assert CompactReader(data).read_map() == {b'k': 3}
+
+
+class TestRangedReadDeadline:
+    def sniff(self, server, timeout):
+        client = GitHubClient(None, api_url=server.url, raw_url=server.url)
+        url = client.raw_file_url('owner', 'repo', 'data/analysis.parquet')
+
+        def read(n, tail=False):
+            return client.get_partial(url, n, tail=tail, timeout=timeout)
+
+        start = time.monotonic()
+        result = inspect_data_file('data/analysis.parquet', 10_000, read,
+                                   lambda n: read(n, tail=True))
+        return result, time.monotonic() - start
+
+    def test_stalled_server_gives_up_within_the_timeout(self):
+        with StubServer([reply(206, b'PAR1', delay=5)]) as server:
+            result, elapsed = self.sniff(server, timeout=0.5)
+        assert 'sniff_error' in result
+        assert elapsed < 1.5
+        assert len(server.requests) == 1  # No retries
+
+    def test_stalled_body_gives_up_within_the_timeout(self):
+        with StubServer([reply(206, b'x' * 100, body_delay=5)]) as server:
+            result, elapsed = self.sniff(server, timeout=0.5)
+        assert 'sniff_error' in result
+        assert elapsed < 1.5
+
+    def test_server_errors_are_not_retried(self):
+        with StubServer([reply(503), reply(206, fixture('nested.parquet'))]) as server:
+            result, _ = self.sniff(server, timeout=2)
+        assert 'sniff_error' in result
+        assert len(server.requests) == 1
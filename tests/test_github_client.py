@@ -0,0 +1,80 @@
+import json
+import time
+
+import pytest
+
+from src.github_client import GitHubClient, GitHubError
+from tests.stub_server import StubServer, reply
+
+BODY = json.dumps({'sha': 'abc'}).encode()
+
+
+def client_for(server, **kwargs):
+    # Tiny backoff so retried tests finish quickly
+    return GitHubClient(None, api_url=server.url, raw_url=server.url,
+                        backoff_base=0.01, backoff_max=0.05, **kwargs)
+
+
+def rate_limited(reset):
+    return reply(403, b'{"message": "API rate limit exceeded"}',
+                 {'X-RateLimit-Limit': '60', 'X-RateLimit-Remaining': '0',
+                  'X-RateLimit-Reset': str(int(reset))})
+
+
+def test_server_error_is_retried():
+    with StubServer([reply(503), reply(200, BODY)]) as server:
+        client = client_for(server)
+        assert client.get('/repos/owner/repo') == {'sha': 'abc'}
+    assert len(server.requests) == 2
+    assert client.stats()['retries'] == 1
+
+
+def test_not_modified_returns_the_cached_body():
+    with StubServer([reply(200, BODY, {'ETag': '"v1"'}), reply(304)]) as server:
+        client = client_for(server)
+        first = client.get('/repos/owner/repo')
+        second = client.get('/repos/owner/repo')
+    assert first == second == {'sha': 'abc'}
+    assert 'If-None-Match' not in server.requests[0]['headers']
+    assert server.requests[1]['headers']['If-None-Match'] == '"v1"'
+    assert client.stats()['not_modified'] == 1
+
+
+def test_rate_limit_waits_for_the_reset():
+    with StubServer([rate_limited(time.time() + 1), reply(200, BODY)]) as server:
+        client = client_for(server)
+        assert client.get('/repos/owner/repo') == {'sha': 'abc'}
+    assert len(server.requests) == 2
+    stats = client.stats()
+    assert stats['retries'] == 1
+    assert stats['limit'] == 60
+
+
+def test_rate_limit_reset_past_the_cap_raises():
+    with StubServer([rate_limited(time.time() + 3600), reply(200, BODY)]) as server:
+        client = client_for(server, max_rate_limit_wait=5)
+        start = time.monotonic()
+        with pytest.raises(GitHubError) as error:
+            client.get('/repos/owner/repo')
+    assert time.monotonic() - start < 5
+    assert error.value.status_code == 403
+    assert len(server.requests) == 1
+    assert client.stats()['remaining'] == 0
+
+
+def test_forbidden_is_not_retried():
+    with StubServer([reply(403, b'{"message": "Resource not accessible"}'),
+                     reply(200, BODY)]) as server:
+        client = client_for(server)
+        with pytest.raises(GitHubError) as error:
+            client.get('/repos/owner/repo')
+    assert error.value.status_code == 403
+    assert len(server.requests) == 1
+    assert client.stats()['retries'] == 0
+
+
+def test_head_sha():
+    with StubServer([reply(200, b'0123abc\n')]) as server:
+        assert client_for(server).get_head_sha('owner', 'repo') == '0123abc'
+    assert server.requests[0]['path'] == '/repos/owner/repo/commits/main'
+    assert server.requests[0]['headers']['Accept'] == 'application/vnd.github.sha'
@@ -0,0 +1,67 @@
+from src.prechecks import course_code_in_names, readme_mentions_llm, run_prechecks, software_cited
+
+
+class TestReadmeMentionsLLM:
+    def test_fails_without_top_level_readme(self):
+        outcome = readme_mentions_llm({'docs/README.md': "We used ChatGPT.", 'paper.qmd': ''})
+        assert 'fail' in outcome
+
+    def test_hints_at_the_mention(self):
+        outcome = readme_mentions_llm({'README.md': "# Paper\n\nWe used ChatGPT4 to debug code.\n"})
+        assert 'ChatGPT4' in outcome['hint']
+
+    def test_recognises_common_wording(self):
+        for line in ["We used ChatGPT4 to debug code.", "No generative tools or chatbots were used.",
+                     "GitHub Copilot helped with autocomplete.", "gpt-4o drafted the abstract."]:
+            assert 'mentions LLMs' in readme_mentions_llm({'README.md': line})['hint'], line
+
+    def test_only_hints_when_nothing_matches(self):
+        outcome = readme_mentions_llm({'README.md': "# Paper\n\nNo assistance tools were used.\n"})
+        assert 'fail' not in outcome
+        assert 'hint' in outcome
+
+    def test_nothing_to_say_when_readme_was_not_downloaded(self):
+        assert readme_mentions_llm({'README.md': None}) is None
+
+
+class TestSoftwareCited:
+    def test_fails_without_any_document(self):
+        assert 'fail' in software_cited({'README.txt': 'x', 'scripts/clean.R': 'library(dplyr)'})
+
+    def test_hints_at_the_citation(self):
+        outcome = software_cited({'paper/references.bib': "@Manual{r, author = {{R Core Team}}}"})
+        assert 'R Core Team' in outcome['hint']
+
+    def test_only_hints_when_nothing_matches(self):
+        outcome = software_cited({'paper/paper.qmd': "# Data\n\nWe used R."})
+        assert 'fail' not in outcome
+        assert 'hint' in outcome
+
+    def test_nothing_to_say_when_a_source_was_not_downloaded(self):
+        assert software_cited({'paper/paper.qmd': "# Data", 'paper/references.bib': None}) is None
+
+
+class TestCourseCodeInNames:
+    def test_fails_on_a_course_code_folder(self):
+        outcome = course_code_in_names({'STA304/paper.qmd': ''})
+        assert 'STA304' in outcome['fail']
+
+    def test_fails_on_a_course_code_rproj(self):
+        assert 'fail' in course_code_in_names({'sta304h1.Rproj': ''})
+
+    def test_hints_at_a_code_inside_a_longer_name(self):
+        outcome = course_code_in_names({'STA304_paper/paper.qmd': ''})
+        assert 'fail' not in outcome
+        assert 'STA304' in outcome['hint']
+
+    def test_ignores_codes_in_file_names(self):
+        assert course_code_in_names({'scripts/sta304.R': ''}) is None
+
+    def test_nothing_to_say_about_ordinary_names(self):
+        assert course_code_in_names({'data/ggr_100m_raster/cells.csv': '', 'us-election.Rproj': ''}) is None
+
+
+def test_run_prechecks_collects_failures_and_hints():
+    rules = [('A', lambda files: {'fail': 'no'}), ('B', lambda files: {'hint': 'maybe'}),
+             ('B', lambda files: {'hint': 'also'}), ('C', lambda files: None)]
+    assert run_prechecks({}, rules) == {'failures': {'A': 'no'}, 'hints': {'B': ['maybe', 'also']}}
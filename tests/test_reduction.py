@@ -0,0 +1,31 @@
+from src.reduction import MAX_TXT_CHARS, reduce_content
+
+
+def processed(documentation=None, code=None):
+    return {'documentation': documentation or {}, 'code': code or {}, 'data': {}, 'other': {}}
+
+
+def test_papers_and_code_are_never_truncated():
+    paper = '# Introduction\n' + 'Words. ' * 30_000 + '\n# Conclusion\nThe finding.\n'
+    script = 'x <- 1\n' * 30_000 + 'write_csv(model, "final.csv")\n'
+    content = processed({'paper/paper.qmd': paper}, {'scripts/model.R': script})
+    stats = reduce_content(content)
+    assert content['documentation']['paper/paper.qmd'] == paper
+    assert content['code']['scripts/model.R'] == script
+    assert stats['truncated'] == []
+
+
+def test_txt_files_keep_head_and_tail():
+    log = 'start\n' + 'line\n' * 10_000 + 'end\n'
+    content = processed({'output/log.txt': log})
+    stats = reduce_content(content)
+    reduced = content['documentation']['output/log.txt']
+    assert stats['truncated'] == ['output/log.txt']
+    assert reduced.startswith('start\n') and reduced.endswith('end\n')
+    assert 'truncated' in reduced
+    assert len(reduced) < MAX_TXT_CHARS + 100
+
+
+def test_source_truncation_is_opt_in():
+    content = processed({'paper/paper.md': 'a' * 1000})
+    assert reduce_content(content, max_text_chars=500)['truncated'] == ['paper/paper.md']